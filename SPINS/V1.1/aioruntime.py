@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+"""
+asyncio runtime: Tk pumped from an asyncio event loop.
+
+    python3 main.py --runtime asyncio
+    kiosk config: {"runtime": "asyncio", "screens": [...]}
+
+The normal runtime is Tk's mainloop: the poll tick, the animation and the
+engine's round timers are `after` callbacks, and score files are written
+and metrics served from other threads. AsyncioRuntime runs the same app on
+one asyncio loop in the main thread instead:
+
+    timers   AsyncioClock.after() is loop.call_later(), so poll ticks and the
+             start / next-round delays fire from asyncio's timer heap
+    Tk       a pump task handles every pending Tk event each TK_PUMP_MS
+    metrics  the /metrics endpoint is an asyncio server on the same loop,
+             rendered between ticks instead of by a thread reading counters
+    files    history and statistics writes go to one worker (file I/O has no
+             non-blocking form), in order, while play goes on
+
+Ticks, Tk callbacks and scrapes all run on the loop, so the single-writer
+rule for counters and the event log holds as before. Audio control stays in
+the ticks (mixer calls return at once). Other non-UI work is added with
+spawn(coroutine) and runs between ticks without blocking input.
+"""
+
+import asyncio
+import _tkinter
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS_HOST
+
+TK_PUMP_MS = 5          # Longest a Tk event (click, expose) waits to be handled
+REQUEST_TIMEOUT_S = 5.0  # Scrapes that send nothing for this long are dropped
+
+
+class AsyncioClock:
+    """ Clock interface of clock.py on an asyncio loop. """
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def now(self):
+        return self.loop.time()  # time.monotonic(), as RealClock
+
+    def after(self, ms, callback, *args):
+        return self.loop.call_later(ms / 1000.0, callback, *args)
+
+    def cancel(self, handle):
+        handle.cancel()
+
+
+class AsyncioRuntime:
+    """ Runs the Tk root and everything scheduled on `clock` from one asyncio loop. """
+
+    def __init__(self, root, pump_ms=TK_PUMP_MS):
+        self.root = root
+        self.pump_s = pump_ms / 1000.0
+        self.loop = asyncio.new_event_loop()
+        self.clock = AsyncioClock(self.loop)
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spins-io")
+        self.tasks = set()
+        self.servers = []
+        self._stopping = asyncio.Event()  # Bound to the running loop on first use (Python 3.10+)
+
+    def io(self, fn, *args):
+        """ Run a blocking file write on the worker; writes happen in submission order. """
+        future = self.loop.run_in_executor(self.writer, fn, *args)
+        self.tasks.add(future)
+        future.add_done_callback(self.tasks.discard)
+        return future
+
+    def spawn(self, coro):
+        """ Run a coroutine alongside the app until the runtime stops. """
+        task = self.loop.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def serve_metrics(self, exporter, port, host=METRICS_HOST):
+        """ Serve exporter on http://host:port/metrics from the loop; returns the bound port. """
+        server = self.loop.run_until_complete(
+            asyncio.start_server(lambda r, w: _serve_metrics(exporter, r, w), host, port))
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        """ Leave run() once the current callback returns (e.g. from WM_DELETE_WINDOW). """
+        self._stopping.set()
+
+    def run(self):
+        """ Pump Tk and run the loop until stop(); then finish pending writes and close. """
+        try:
+            self.loop.run_until_complete(self._pump())
+        finally:
+            self._shutdown()
+
+    async def _pump(self):
+        dooneevent = self.root.tk.dooneevent
+        flags = _tkinter.ALL_EVENTS | _tkinter.DONT_WAIT
+        while not self._stopping.is_set():
+            while dooneevent(flags):
+                pass
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.pump_s)
+            except asyncio.TimeoutError:
+                pass
+
+    def _shutdown(self):
+        for server in self.servers:
+            server.close()
+        for task in list(self.tasks):
+            if isinstance(task, asyncio.Task):
+                task.cancel()
+        if self.tasks:
+            self.loop.run_until_complete(asyncio.gather(*self.tasks, return_exceptions=True))
+        self.writer.shutdown(wait=True)
+        self.loop.close()
+
+
+async def _serve_metrics(exporter, reader, writer):
+    try:
+        request = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_S)
+        while (await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_S)).strip():
+            pass  # Headers
+        parts = request.split()
+        if len(parts) < 2 or parts[0] != b"GET" or parts[1].split(b"?")[0] != b"/metrics":
+            writer.write(b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        else:
+            body = exporter.render().encode()
+            writer.write(b"HTTP/1.0 200 OK\r\n"
+                         b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
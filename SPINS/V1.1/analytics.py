@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+import csv
+import json
+import math
+import os
+import sys
+
+# Quantiles tracked for every metric
+TRACKED_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RunningStats:
+    """ Welford running mean/variance with min and max, O(1) memory. """
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        """ Sample variance (0.0 until there are two values). """
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def state(self):
+        """ [count, mean, m2, min, max], JSON-safe. """
+        if not self.count:
+            return [0, 0.0, 0.0, None, None]
+        return [self.count, self.mean, self._m2, self.min, self.max]
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        count, mean, m2, lo, hi = state
+        if count:
+            stats.count, stats.mean, stats._m2, stats.min, stats.max = int(count), mean, m2, lo, hi
+        return stats
+
+
+class P2Quantile:
+    """ Streaming quantile estimate using the P-square algorithm (5 markers). """
+    __slots__ = ("p", "_q", "_n", "_np", "_dn")
+
+    def __init__(self, p):
+        self.p = p
+        self._q = []   # marker heights (raw values until 5 have been seen)
+        self._n = [0, 1, 2, 3, 4]
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x):
+        q = self._q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self._n
+        # Find the cell containing x and widen the outer markers if needed.
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+        # Nudge the three middle markers towards their desired positions.
+        for i in range(1, 4):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = self._parabolic(i, d)
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def state(self):
+        """ The markers: heights q, positions n and desired positions np. """
+        return {"p": self.p, "q": list(self._q), "n": list(self._n), "np": list(self._np)}
+
+    @classmethod
+    def from_state(cls, state):
+        quantile = cls(state["p"])
+        quantile._q = [float(x) for x in state["q"]]
+        quantile._n = [int(x) for x in state["n"]]
+        quantile._np = [float(x) for x in state["np"]]
+        return quantile
+
+    def _parabolic(self, i, d):
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self):
+        q = self._q
+        if not q:
+            return None
+        if len(q) < 5:
+            # Exact (linear interpolated) quantile of the few values seen so far.
+            pos = self.p * (len(q) - 1)
+            lo = int(pos)
+            hi = min(lo + 1, len(q) - 1)
+            return q[lo] + (q[hi] - q[lo]) * (pos - lo)
+        return q[2]
+
+
+class MetricSketch:
+    """ Running stats plus streaming quantiles for one metric. """
+    __slots__ = ("stats", "quantiles")
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.quantiles = [P2Quantile(p) for p in TRACKED_QUANTILES]
+
+    def add(self, x):
+        self.stats.add(x)
+        for quantile in self.quantiles:
+            quantile.add(x)
+
+    def state(self):
+        return {"stats": self.stats.state(), "quantiles": [q.state() for q in self.quantiles]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls()
+        sketch.stats = RunningStats.from_state(state["stats"])
+        saved = {q["p"]: q for q in state["quantiles"]}
+        # A quantile added to TRACKED_QUANTILES since starts from scratch.
+        sketch.quantiles = [P2Quantile.from_state(saved[q.p]) if q.p in saved else q for q in sketch.quantiles]
+        return sketch
+
+    def summary(self):
+        s = self.stats
+        row = {
+            "count": s.count,
+            "mean": s.mean if s.count else None,
+            "stdev": s.stdev,
+            "min": s.min if s.count else None,
+            "max": s.max if s.count else None,
+        }
+        for quantile in self.quantiles:
+            row[f"p{int(round(quantile.p * 100))}"] = quantile.value
+        return row
+
+
+class ReactionAnalytics:
+    """
+    Incrementally updated reaction-time statistics for Game Mode.
+    Keeps one sketch overall, one per sensor pin, one per round index and one
+    for completed game totals, so memory does not grow with the history.
+    """
+
+    def __init__(self):
+        self.rounds = MetricSketch()
+        self.games = MetricSketch()
+        self.per_sensor = {}   # GPIO pin -> MetricSketch
+        self.per_round = {}    # round number (1-based) -> MetricSketch
+        self.wrong_hits = 0
+
+    def record_round(self, pin, round_number, elapsed):
+        """ Called for every correct hit with the sensor pin and reaction time. """
+        self.rounds.add(elapsed)
+        sketch = self.per_sensor.get(pin)
+        if sketch is None:
+            sketch = self.per_sensor[pin] = MetricSketch()
+        sketch.add(elapsed)
+        sketch = self.per_round.get(round_number)
+        if sketch is None:
+            sketch = self.per_round[round_number] = MetricSketch()
+        sketch.add(elapsed)
+
+    def record_game(self, total_time):
+        self.games.add(total_time)
+
+    def record_wrong_hit(self):
+        self.wrong_hits += 1
+
+    def summary(self):
+        return {
+            "rounds": self.rounds.summary(),
+            "games": self.games.summary(),
+            "wrong_hits": self.wrong_hits,
+            "per_sensor": {str(pin): s.summary() for pin, s in sorted(self.per_sensor.items())},
+            "per_round": {str(r): s.summary() for r, s in sorted(self.per_round.items())},
+        }
+
+    def state(self):
+        """ Everything needed to carry on after a restart (see load_json). """
+        return {
+            "rounds": self.rounds.state(),
+            "games": self.games.state(),
+            "wrong_hits": self.wrong_hits,
+            "per_sensor": {str(pin): s.state() for pin, s in self.per_sensor.items()},
+            "per_round": {str(r): s.state() for r, s in self.per_round.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        analytics = cls()
+        analytics.rounds = MetricSketch.from_state(state["rounds"])
+        analytics.games = MetricSketch.from_state(state["games"])
+        analytics.wrong_hits = int(state["wrong_hits"])
+        analytics.per_sensor = {int(pin): MetricSketch.from_state(s) for pin, s in state["per_sensor"].items()}
+        analytics.per_round = {int(r): MetricSketch.from_state(s) for r, s in state["per_round"].items()}
+        return analytics
+
+    @classmethod
+    def load_json(cls, path):
+        """ Statistics saved by export_json, or empty ones if there are none (or they are unreadable). """
+        try:
+            with open(path) as f:
+                return cls.from_state(json.load(f)["state"])
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"cannot restore statistics from {path} ({e!r}); starting afresh", file=sys.stderr)
+            return cls()
+
+    def slowest_sensor(self):
+        """ Returns (pin, mean) of the sensor with the highest mean reaction time. """
+        if not self.per_sensor:
+            return None
+        pin, sketch = max(self.per_sensor.items(), key=lambda item: item[1].stats.mean)
+        return pin, sketch.stats.mean
+
+    def summary_text(self):
+        """ Short multi-line summary for the on-screen scoreboard. """
+        if not self.rounds.stats.count:
+            return "No reaction times yet."
+        lines = []
+        r = self.rounds.summary()
+        lines.append(f"All rounds: mean {r['mean']:.2f}s  p90 {r['p90']:.2f}s  (n={r['count']})")
+        for pin, sketch in sorted(self.per_sensor.items()):
+            s = sketch.summary()
+            lines.append(f"GPIO {pin}: mean {s['mean']:.2f}s  sd {s['stdev']:.2f}s  (n={s['count']})")
+        slowest = self.slowest_sensor()
+        if slowest and len(self.per_sensor) > 1:
+            lines.append(f"Slowest sensor: GPIO {slowest[0]}")
+        return "\n".join(lines)
+
+    # ------------------- Export -------------------
+    def export_json(self, path):
+        """ The summary plus the sketch state it is restored from; replaced atomically. """
+        doc = dict(self.summary(), state=self.state())
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(doc, f, indent=2)
+        os.replace(tmp, path)
+
+    def export_csv(self, path):
+        """ One row per metric: scope (all/games/sensor/round), key and its summary. """
+        fields = ["scope", "key", "count", "mean", "stdev", "min", "max"]
+        fields += [f"p{int(round(p * 100))}" for p in TRACKED_QUANTILES]
+        rows = [("all", "", self.rounds), ("games", "", self.games)]
+        rows += [("sensor", pin, s) for pin, s in sorted(self.per_sensor.items())]
+        rows += [("round", r, s) for r, s in sorted(self.per_round.items())]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for scope, key, sketch in rows:
+                row = sketch.summary()
+                row["scope"] = scope
+                row["key"] = key
+                writer.writerow(row)
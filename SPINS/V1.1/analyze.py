@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Batch analysis of the SPINS round history (history.bin).
+
+    python3 analyze.py [history.bin] [--top 10] [--glitch 0.15] [--json report.json]
+
+The whole file is mapped into one NumPy structured array and every report is
+computed with grouped array operations, so a million rounds take seconds.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import ROUNDS_PER_GAME
+from history import RECORD
+
+HISTORY_PATH = "history.bin"
+
+# Same layout as history.RECORD ("<IdBHBf")
+HISTORY_DTYPE = np.dtype([
+    ("game", "<u4"),
+    ("ended_at", "<f8"),
+    ("round", "u1"),
+    ("pin", "<u2"),
+    ("completed", "u1"),
+    ("reaction", "<f4"),
+])
+assert HISTORY_DTYPE.itemsize == RECORD.size
+
+
+def load_history(path):
+    """ Memory-map the history file (a trailing partial record is ignored). """
+    if os.path.getsize(path) < HISTORY_DTYPE.itemsize:
+        return np.zeros(0, dtype=HISTORY_DTYPE)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    usable = len(raw) - len(raw) % HISTORY_DTYPE.itemsize
+    return raw[:usable].view(HISTORY_DTYPE)
+
+
+def _group_medians(keys, values):
+    """ Median of values per key (keys are dense 0..k-1 group indices). """
+    order = np.lexsort((values, keys))
+    counts = np.bincount(keys)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    lo = order[starts + (counts - 1) // 2]
+    hi = order[starts + counts // 2]
+    return (values[lo] + values[hi]) / 2.0
+
+
+def _group_quantile(keys, values, q):
+    """ Nearest-rank quantile of values per key. """
+    order = np.lexsort((values, keys))
+    counts = np.bincount(keys)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    idx = starts + np.minimum(counts - 1, np.floor(q * counts).astype(np.int64))
+    return values[order[idx]]
+
+
+def leaderboard(h, top):
+    """ Fastest completed games by total reaction time. """
+    done = h[h["completed"] == 1]
+    if len(done) == 0:
+        return []
+    games, inverse = np.unique(done["game"], return_inverse=True)
+    totals = np.bincount(inverse, weights=done["reaction"].astype(np.float64))
+    rounds = np.bincount(inverse)
+    ended = np.zeros(len(games))
+    np.maximum.at(ended, inverse, done["ended_at"])
+    full = rounds >= ROUNDS_PER_GAME
+    games, totals, ended = games[full], totals[full], ended[full]
+    best = np.argsort(totals, kind="stable")[:top]
+    return [
+        {"game": int(games[i]), "total": float(totals[i]), "ended_at": float(ended[i])}
+        for i in best
+    ]
+
+
+def daily_trends(h):
+    """ Rounds, games and mean/median reaction time per local calendar day. """
+    offset = time.localtime().tm_gmtoff
+    day_numbers = ((h["ended_at"] + offset) // 86400).astype(np.int64)
+    days, inverse = np.unique(day_numbers, return_inverse=True)
+    reaction = h["reaction"].astype(np.float64)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=reaction) / counts
+    medians = _group_medians(inverse, reaction)
+    # Distinct games per day from unique (day, game) keys.
+    game = h["game"].astype(np.int64)
+    pairs = np.unique(inverse * (int(game.max()) + 1) + game)
+    games = np.bincount(pairs // (int(game.max()) + 1), minlength=len(days))
+    return [
+        {
+            "day": time.strftime("%Y-%m-%d", time.gmtime(int(d) * 86400)),
+            "rounds": int(counts[i]),
+            "games": int(games[i]),
+            "mean": float(means[i]),
+            "median": float(medians[i]),
+        }
+        for i, d in enumerate(days)
+    ]
+
+
+def sensor_latency(h):
+    """ Per-pin reaction-time distribution, compared against all sensors. """
+    pins, inverse = np.unique(h["pin"], return_inverse=True)
+    reaction = h["reaction"].astype(np.float64)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=reaction) / counts
+    sq = np.bincount(inverse, weights=reaction * reaction) / counts
+    stdev = np.sqrt(np.maximum(sq - means * means, 0.0))
+    medians = _group_medians(inverse, reaction)
+    p90 = _group_quantile(inverse, reaction, 0.9)
+    overall = float(reaction.mean())
+    return [
+        {
+            "pin": int(p),
+            "rounds": int(counts[i]),
+            "mean": float(means[i]),
+            "stdev": float(stdev[i]),
+            "median": float(medians[i]),
+            "p90": float(p90[i]),
+            "vs_overall": float(means[i] - overall),
+        }
+        for i, p in enumerate(pins)
+    ]
+
+
+def glitch_outliers(h, floor):
+    """
+    Suspiciously fast hits: below an absolute floor (faster than a person can
+    aim) or more than 3.5 robust z-scores below their sensor's median.
+    """
+    pins, inverse = np.unique(h["pin"], return_inverse=True)
+    reaction = h["reaction"].astype(np.float64)
+    medians = _group_medians(inverse, reaction)
+    deviation = np.abs(reaction - medians[inverse])
+    mad = _group_medians(inverse, deviation) * 1.4826
+    mad = np.where(mad > 0, mad, np.inf)
+    z = (reaction - medians[inverse]) / mad[inverse]
+    flagged = (reaction < floor) | (z < -3.5)
+    per_pin = np.bincount(inverse[flagged], minlength=len(pins))
+    worst = np.flatnonzero(flagged)
+    worst = worst[np.argsort(reaction[worst], kind="stable")[:10]]
+    return {
+        "total": int(flagged.sum()),
+        "per_pin": {str(int(p)): int(per_pin[i]) for i, p in enumerate(pins)},
+        "fastest": [
+            {"game": int(h["game"][i]), "round": int(h["round"][i]),
+             "pin": int(h["pin"][i]), "reaction": float(reaction[i])}
+            for i in worst
+        ],
+    }
+
+
+def analyze(h, top=10, glitch=0.15):
+    return {
+        "rounds": int(len(h)),
+        "games": int(len(np.unique(h["game"]))) if len(h) else 0,
+        "leaderboard": leaderboard(h, top) if len(h) else [],
+        "daily": daily_trends(h) if len(h) else [],
+        "sensors": sensor_latency(h) if len(h) else [],
+        "outliers": glitch_outliers(h, glitch) if len(h) else {"total": 0, "per_pin": {}, "fastest": []},
+    }
+
+
+def print_report(report):
+    print(f"{report['rounds']} rounds in {report['games']} games")
+    print("\nLeaderboard (completed games):")
+    for rank, row in enumerate(report["leaderboard"], 1):
+        ended = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["ended_at"]))
+        print(f"  {rank:2d}. game {row['game']:<8d} {row['total']:6.2f} sec  ({ended})")
+    print("\nPer day:")
+    for row in report["daily"]:
+        print(f"  {row['day']}  games {row['games']:6d}  rounds {row['rounds']:7d}  "
+              f"mean {row['mean']:.3f}s  median {row['median']:.3f}s")
+    print("\nPer sensor:")
+    for row in report["sensors"]:
+        print(f"  GPIO {row['pin']:<3d} rounds {row['rounds']:7d}  mean {row['mean']:.3f}s  "
+              f"median {row['median']:.3f}s  p90 {row['p90']:.3f}s  "
+              f"({row['vs_overall']:+.3f}s vs all)")
+    outliers = report["outliers"]
+    print(f"\nSuspiciously fast hits: {outliers['total']}")
+    for pin, count in outliers["per_pin"].items():
+        if count:
+            print(f"  GPIO {pin}: {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse the SPINS round history.")
+    parser.add_argument("history", nargs="?", default=HISTORY_PATH, help="history file (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, help="leaderboard size")
+    parser.add_argument("--glitch", type=float, default=0.15,
+                        help="reaction times below this many seconds count as sensor glitches")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        h = load_history(args.history)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {args.history}: {e}", file=sys.stderr)
+        return 1
+    report = analyze(h, top=args.top, glitch=args.glitch)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+
+"""
+Pre-decoded SPINS assets in one flat buffer (an "asset pack").
+
+Layout, little endian:
+
+    8s  magic b"SPINSPK\\0", written last so a half-written pack never parses
+    I   format version
+    I   length of the JSON index that follows
+    ... JSON index, then the blobs it points at (each 16-byte aligned)
+
+Frames are binary PPM (P6) images with transparent pixels already blended
+onto the window background, so Tk loads them with
+PhotoImage(data=..., format="ppm") instead of decoding the GIF again.
+Sounds are raw PCM in the mixer's format (pygame Sound.get_raw()).
+
+The same bytes live in shared memory (sharedassets.py) or in a bundle file
+built by bundle.py and memory-mapped at startup.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+MAGIC = b"SPINSPK\0"
+PACK_VERSION = 1
+HEADER = struct.Struct("<8sII")
+ALIGN = 16
+
+
+def parse_color(color):
+    """ "#40FF00" -> (64, 255, 0) """
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def ppm(width, height, rgb):
+    """ A binary PPM image Tk can load from memory. """
+    return b"P6\n%d %d\n255\n" % (width, height) + bytes(rgb)
+
+
+def image_size(path):
+    """ (width, height) of a GIF or PNG from its header, without decoding it. """
+    with open(path, "rb") as f:
+        head = f.read(24)
+    if head[:3] == b"GIF":
+        return struct.unpack_from("<HH", head, 6)
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack_from(">II", head, 16)
+    raise ValueError(f"{path} is neither a GIF nor a PNG")
+
+
+# --- Decoders (pure Python; only run when a pack is built) ---
+
+def _palette_tables(palette, background, alpha=None):
+    """
+    Split an RGB palette into three 256-byte translate() tables, blending
+    entries with alpha < 255 onto the background colour.
+    """
+    r_table, g_table, b_table = bytearray(256), bytearray(256), bytearray(256)
+    for i in range(min(len(palette) // 3, 256)):
+        rgb = palette[3 * i:3 * i + 3]
+        a = 255 if alpha is None or i >= len(alpha) else alpha[i]
+        rgb = [(c * a + bg * (255 - a)) // 255 for c, bg in zip(rgb, background)]
+        r_table[i], g_table[i], b_table[i] = rgb
+    return bytes(r_table), bytes(g_table), bytes(b_table)
+
+
+def _expand(indices, tables):
+    """ Palette indices -> interleaved RGB bytes. """
+    rgb = bytearray(3 * len(indices))
+    rgb[0::3] = indices.translate(tables[0])
+    rgb[1::3] = indices.translate(tables[1])
+    rgb[2::3] = indices.translate(tables[2])
+    return rgb
+
+
+def _lzw_decode(data, min_code_size, pixel_count):
+    clear = 1 << min_code_size
+    end = clear + 1
+    base = [bytes([i]) for i in range(clear)] + [b"", b""]
+    table = list(base)
+    code_size = min_code_size + 1
+    out = bytearray()
+    prev = None
+    bits = 0
+    nbits = 0
+    for byte in data:
+        bits |= byte << nbits
+        nbits += 8
+        while nbits >= code_size:
+            code = bits & ((1 << code_size) - 1)
+            bits >>= code_size
+            nbits -= code_size
+            if code == clear:
+                table = list(base)
+                code_size = min_code_size + 1
+                prev = None
+                continue
+            if code == end:
+                return bytes(out[:pixel_count])
+            if prev is None:
+                entry = table[code]
+            elif code < len(table):
+                entry = table[code]
+                table.append(prev + entry[:1])
+            else:
+                entry = prev + prev[:1]
+                table.append(entry)
+            out += entry
+            prev = entry
+            if len(table) == 1 << code_size and code_size < 12:
+                code_size += 1
+    return bytes(out[:pixel_count])
+
+
+def _deinterlace(indices, width, height):
+    rows = [indices[y * width:(y + 1) * width] for y in range(height)]
+    order = [y for start, step in ((0, 8), (4, 8), (2, 4), (1, 2)) for y in range(start, height, step)]
+    result = [b""] * height
+    for row, y in zip(rows, order):
+        result[y] = row
+    return b"".join(result)
+
+
+def _sub_blocks(data, pos):
+    chunks = []
+    while data[pos]:
+        chunks.append(data[pos + 1:pos + 1 + data[pos]])
+        pos += 1 + data[pos]
+    return b"".join(chunks), pos + 1
+
+
+def decode_gif(path, background):
+    """
+    Every frame of an animated GIF as RGB bytes, the way Tk shows
+    `gif -index N`: each frame on its own at the logical screen size, with
+    transparent and uncovered pixels in the background colour.
+    Returns (width, height, frames, durations_ms).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError(f"{path} is not a GIF")
+    width, height, flags = struct.unpack_from("<HHB", data, 6)
+    pos = 13
+    global_palette = None
+    if flags & 0x80:
+        size = 3 << ((flags & 7) + 1)
+        global_palette = data[pos:pos + size]
+        pos += size
+    blank = bytes(background) * (width * height)
+    frames, durations = [], []
+    transparent, delay = None, 0
+    while pos < len(data) and data[pos] != 0x3B:
+        block = data[pos]
+        if block == 0x21:  # Extension
+            label = data[pos + 1]
+            if label == 0xF9:  # Graphic control: delay and transparency
+                packed, delay, index = struct.unpack_from("<BHB", data, pos + 3)
+                transparent = index if packed & 1 else None
+            _, pos = _sub_blocks(data, pos + 2)
+        elif block == 0x2C:  # Image
+            left, top, w, h, packed = struct.unpack_from("<HHHHB", data, pos + 1)
+            pos += 10
+            palette = global_palette
+            if packed & 0x80:
+                size = 3 << ((packed & 7) + 1)
+                palette = data[pos:pos + size]
+                pos += size
+            min_code_size = data[pos]
+            lzw, pos = _sub_blocks(data, pos + 1)
+            indices = _lzw_decode(lzw, min_code_size, w * h)
+            indices = indices.ljust(w * h, b"\0")
+            if packed & 0x40:
+                indices = _deinterlace(indices, w, h)
+            tables = _palette_tables(palette, background)
+            canvas = bytearray(blank)
+            for y in range(max(0, min(h, height - top))):
+                row = indices[y * w:(y + 1) * w][:max(0, width - left)]
+                start = 3 * ((top + y) * width + left)
+                if transparent is None or transparent not in row:
+                    canvas[start:start + 3 * len(row)] = _expand(row, tables)
+                    continue
+                x = 0
+                for run in row.split(bytes([transparent])):
+                    if run:
+                        canvas[start + 3 * x:start + 3 * (x + len(run))] = _expand(run, tables)
+                    x += len(run) + 1
+            frames.append(bytes(canvas))
+            durations.append(delay * 10)
+            transparent, delay = None, 0
+        else:
+            raise ValueError(f"{path}: unexpected GIF block 0x{block:02x}")
+    return width, height, frames, durations
+
+
+def gif_frame_keys(path):
+    """
+    A digest per GIF frame of everything that decides its pixels (placement,
+    palette, transparency and image data), found without decoding:
+    frames with equal keys look the same.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    flags = data[10]
+    pos = 13 + (3 << ((flags & 7) + 1) if flags & 0x80 else 0)
+    keys = []
+    control = b""
+    while pos < len(data) and data[pos] != 0x3B:
+        if data[pos] == 0x21:
+            if data[pos + 1] == 0xF9:
+                # Disposal and transparency matter; the delay does not.
+                control = bytes([data[pos + 3] & 0x1D, data[pos + 6]])
+            _, pos = _sub_blocks(data, pos + 2)
+        elif data[pos] == 0x2C:
+            packed = data[pos + 9]
+            end = pos + 10 + (3 << ((packed & 7) + 1) if packed & 0x80 else 0) + 1
+            image, next_pos = _sub_blocks(data, end)
+            keys.append(hashlib.sha1(control + data[pos:end] + image).hexdigest())
+            pos, control = next_pos, b""
+        else:
+            raise ValueError(f"{path}: unexpected GIF block 0x{data[pos]:02x}")
+    return keys
+
+
+def _unfilter(raw, width, height, bpp):
+    stride = width * bpp
+    rows = []
+    prev = bytearray(stride)
+    pos = 0
+    for _ in range(height):
+        kind = raw[pos]
+        row = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        if kind == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + prev[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                a = row[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                row[i] = (row[i] + pred) & 0xFF
+        rows.append(row)
+        prev = row
+    return rows
+
+
+def decode_png(path, background):
+    """
+    A non-interlaced 8-bit PNG (palette, grey or RGB, with or without
+    alpha) as RGB bytes blended onto the background colour.
+    Returns (width, height, rgb).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError(f"{path} is not a PNG")
+    pos = 8
+    idat, palette, alpha = [], None, None
+    while pos < len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = body
+        elif kind == b"tRNS":
+            alpha = body
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    if depth != 8 or interlace or channels is None:
+        raise ValueError(f"{path}: only non-interlaced 8-bit PNGs are supported")
+    rows = _unfilter(zlib.decompress(b"".join(idat)), width, height, channels)
+    if color_type in (0, 4):  # Grey: treat as a palette of 256 greys
+        palette = bytes(v for i in range(256) for v in (i, i, i))
+    if color_type in (0, 3):
+        tables = _palette_tables(palette, background, alpha if color_type == 3 else None)
+        return width, height, bytes(_expand(b"".join(rows), tables))
+    rgb = bytearray()
+    for row in rows:
+        if color_type == 2:
+            rgb += row
+            continue
+        for i in range(0, len(row), channels):
+            a = row[i + channels - 1]
+            pixel = row[i:i + 3] if color_type == 6 else row[i:i + 1] * 3
+            rgb += bytes((c * a + bg * (255 - a)) // 255 for c, bg in zip(pixel, background))
+    return width, height, bytes(rgb)
+
+
+# --- Pack layout ---
+
+def build_pack(images, sounds, meta=None):
+    """
+    Lay out decoded assets as one pack.
+
+    images: name -> (width, height, [rgb frame bytes], [duration ms])
+    sounds: name -> (pcm bytes, (frequency, size, channels))
+    meta:   free-form JSON-able details (how and from what it was built)
+    """
+    blobs = []
+    seen = {}  # Identical blobs (e.g. repeated frames) are stored once
+    index = {"meta": meta or {}, "images": {}, "sounds": {}}
+
+    def add(blob):
+        if blob not in seen:
+            seen[blob] = len(blobs)
+            blobs.append(blob)
+        return seen[blob]
+
+    for name, (width, height, frames, durations) in images.items():
+        index["images"][name] = {
+            "width": width, "height": height, "durations": list(durations),
+            "frames": [add(ppm(width, height, rgb)) for rgb in frames],
+        }
+    for name, (pcm, mixer_format) in sounds.items():
+        index["sounds"][name] = {"pcm": add(bytes(pcm)), "format": list(mixer_format)}
+
+    # Offsets depend on the index length, which depends on the offsets:
+    # reserve room for them first, then fill them in.
+    index["blobs"] = [[0, len(blob)] for blob in blobs]
+    placeholder = json.dumps(index).encode()
+    start = _align(HEADER.size + len(placeholder) + 16 * len(blobs))
+    offset = start
+    for entry in index["blobs"]:
+        entry[0] = offset
+        offset = _align(offset + entry[1])
+    encoded = json.dumps(index).encode()
+    assert HEADER.size + len(encoded) <= start
+
+    pack = bytearray(offset)
+    HEADER.pack_into(pack, 0, b"\0" * 8, PACK_VERSION, len(encoded))
+    pack[HEADER.size:HEADER.size + len(encoded)] = encoded
+    for (blob_offset, length), blob in zip(index["blobs"], blobs):
+        pack[blob_offset:blob_offset + length] = blob
+    return pack
+
+
+def seal(buffer):
+    """ Write the magic, marking a fully written pack as ready. """
+    buffer[:len(MAGIC)] = MAGIC
+
+
+def is_sealed(buffer):
+    return bytes(buffer[:len(MAGIC)]) == MAGIC
+
+
+def write_pack(path, pack):
+    """ Seal and write a pack; the rename keeps running apps on the file they mapped. """
+    seal(pack)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pack)
+    os.replace(tmp, path)
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class AssetPack:
+    """
+    Read-only view of a pack in any buffer (bytes, mmap, shared memory).
+    Frames and PCM come back as memoryviews into that buffer; nothing is
+    copied until Tk or pygame takes the data.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        magic, version, index_length = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a SPINS asset pack (or not fully written)")
+        if version != PACK_VERSION:
+            raise ValueError(f"asset pack version {version}, expected {PACK_VERSION}")
+        self.version = version
+        self.index = json.loads(bytes(self.buffer[HEADER.size:HEADER.size + index_length]))
+        self.nbytes = len(self.buffer)
+        self.meta = self.index["meta"]
+
+    def _blob(self, i):
+        offset, length = self.index["blobs"][i]
+        return self.buffer[offset:offset + length]
+
+    def image(self, name):
+        return self.index["images"][name]
+
+    def frames(self, name):
+        """ PPM data of every frame of an image. """
+        return [self._blob(i) for i in self.index["images"][name]["frames"]]
+
+    def durations(self, name):
+        return self.index["images"][name]["durations"]
+
+    def sound(self, name):
+        """ (pcm, (frequency, size, channels)) """
+        entry = self.index["sounds"][name]
+        return self._blob(entry["pcm"]), tuple(entry["format"])
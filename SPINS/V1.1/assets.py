@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+import mmap
+import os
+import sys
+import tkinter as tk
+import pygame
+
+import assetpack
+import sharedassets
+from audio import PygameAudio
+from framestore import TK_BYTES_PER_PIXEL, PackedFrames
+
+FRAME_STORAGE_MODES = ("photos", "packed")
+NEAR_DUPLICATE_MEAN = 1.5  # Mean / max channel difference (0-255) between 1/8-size
+NEAR_DUPLICATE_MAX = 12    # thumbnails below which consecutive frames count as the same
+
+
+def load_gif_frames(path):
+    """ Decode every frame of an animated GIF into PhotoImages; repeated frames share one. """
+    keys = assetpack.gif_frame_keys(path)
+    decoded = {}
+    frames = []
+    for frame_index, key in enumerate(keys):
+        if key not in decoded:
+            decoded[key] = tk.PhotoImage(
+                file=path,
+                format=f"gif -index {frame_index}"
+            )
+        frames.append(decoded[key])
+    return frames
+
+
+def _resample(rgb, width, height, size):
+    return pygame.image.tobytes(pygame.transform.smoothscale(pygame.image.frombuffer(rgb, (width, height), "RGB"), size), "RGB")
+
+
+def scale_image(image, factor):
+    """ Resample a decoded (width, height, frames, durations) image once, with pygame's smoothscale. """
+    width, height, frames, durations = image
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    done = {}  # Merged duplicates are the same object: resample them once
+    scaled = []
+    for rgb in frames:
+        if id(rgb) not in done:
+            done[id(rgb)] = _resample(rgb, width, height, size)
+        scaled.append(done[id(rgb)])
+    return size[0], size[1], scaled, durations
+
+
+def merge_near_duplicates(image):
+    """
+    Replace every frame that cannot be told apart from the last distinct
+    frame with that frame, so the pack stores it once. Frames are compared
+    as 1/8-size thumbnails.
+    """
+    width, height, frames, durations = image
+    size = (max(1, width // 8), max(1, height // 8))
+    merged = [frames[0]]
+    kept = _resample(frames[0], width, height, size)
+    for rgb in frames[1:]:
+        thumb = _resample(rgb, width, height, size)
+        diffs = [abs(x - y) for x, y in zip(thumb, kept)]
+        if max(diffs) <= NEAR_DUPLICATE_MAX and sum(diffs) <= NEAR_DUPLICATE_MEAN * len(diffs):
+            merged.append(merged[-1])
+        else:
+            merged.append(rgb)
+            kept = thumb
+    return width, height, merged, durations
+
+
+def decode_assets(still_path, gif_path, audio_path, warning_path, background, scale=1.0, meta=None):
+    """
+    Decode the source files into an asset pack (needs the mixer initialised).
+    Without audio paths the pack only holds the images.
+    """
+    color = assetpack.parse_color(background)
+    width, height, still = assetpack.decode_png(still_path, color)
+    images = {
+        "still": (width, height, [still], [0]),
+        "spin": merge_near_duplicates(assetpack.decode_gif(gif_path, color)),
+    }
+    meta = dict(meta or {}, scale=scale, native={name: image[:2] for name, image in images.items()})
+    if scale != 1.0:
+        images = {name: scale_image(image, scale) for name, image in images.items()}
+    sounds = {}
+    if audio_path is not None:
+        mixer_format = pygame.mixer.get_init()
+        sounds = {
+            "music": (pygame.mixer.Sound(audio_path).get_raw(), mixer_format),
+            "warning": (pygame.mixer.Sound(warning_path).get_raw(), mixer_format),
+        }
+    return assetpack.build_pack(images, sounds, meta)
+
+
+def pack_photos(pack, name="spin"):
+    """ The frames of an image in an asset pack as PhotoImages, one per distinct frame. """
+    photos = {}
+    frames = []
+    for frame, blob in zip(pack.frames(name), pack.image(name)["frames"]):
+        if blob not in photos:
+            photos[blob] = tk.PhotoImage(data=bytes(frame), format="ppm")
+        frames.append(photos[blob])
+    return frames
+
+
+def open_bundle(path, sources=(), mixer_format=None):
+    """
+    Memory-map a bundle built by bundle.py. Returns None (with a note on
+    stderr) when it is missing, older than one of the source files or was
+    built for another mixer format than mixer_format (if given), so the
+    caller decodes the sources.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        built = os.stat(path).st_mtime
+    except (OSError, ValueError):
+        return None
+    stale = [src for src in sources if os.path.exists(src) and os.stat(src).st_mtime > built]
+    if stale:
+        print(f"{path} is older than {', '.join(stale)}; decoding the sources (rebuild with bundle.py)", file=sys.stderr)
+        return None
+    try:
+        pack = assetpack.AssetPack(mapping)
+    except ValueError as e:
+        print(f"{path}: {e}; decoding the sources", file=sys.stderr)
+        return None
+    if mixer_format is not None and "music" in pack.index["sounds"] and pack.sound("music")[1] != mixer_format:
+        print(f"{path} was built for mixer format {pack.sound('music')[1]}, the mixer runs "
+              f"{mixer_format}; decoding the sources", file=sys.stderr)
+        return None
+    return pack
+
+
+def _photo_bytes(photo):
+    return photo.width() * photo.height() * TK_BYTES_PER_PIXEL
+
+
+def format_memory_report(rows):
+    lines = [f"{'asset':<14} {'storage':<26} {'frames':>6} {'unique':>6} {'MB':>8}"]
+    for row in rows:
+        frames = "" if row["frames"] is None else row["frames"]
+        unique = "" if row["unique"] is None else row["unique"]
+        lines.append(f"{row['asset']:<14} {row['storage']:<26} {frames:>6} {unique:>6} {row['bytes'] / 1e6:8.2f}")
+    lines.append(f"{'total':<14} {'':<26} {'':>6} {'':>6} {sum(r['bytes'] for r in rows) / 1e6:8.2f}")
+    return "\n".join(lines)
+
+
+class AssetStore:
+    """
+    Decoded images and sounds, loaded once per process and shared by every
+    window. PhotoImages belong to the Tk interpreter, so all Toplevels of one
+    root can show the same frames; sounds are shared the same way and each
+    screen plays them on its own channel of the audio backend (audio.py,
+    pygame unless another one is passed in).
+
+    A current bundle (bundle.py) is memory-mapped instead of decoding the
+    source files; its pages sit in the page cache once for all processes.
+    Without one, shared=True takes the decoded data from shared memory
+    (sharedassets.py), so separate SPINS processes decode only once.
+    Both blend transparent pixels onto background.
+
+    images_at() hands out the images resampled for a screen; each size is
+    resampled once and kept in cache_dir for the next start.
+
+    frames="photos" keeps one PhotoImage per distinct GIF frame (made when
+    the first screen asks for that size);
+    frames="packed" keeps the frames compact (GIF file or mapped pack) and
+    expands them on demand (framestore.py), for low-RAM units.
+    """
+
+    def __init__(self, still_path, gif_path, audio_path, warning_path, shared=False,
+                 background="#40FF00", bundle=None, cache_dir=None, frames="photos", audio=None):
+        if frames not in FRAME_STORAGE_MODES:
+            raise ValueError(f"unknown frame storage {frames!r} (expected one of {', '.join(FRAME_STORAGE_MODES)})")
+        self.audio = audio or PygameAudio()
+        self.audio_paths = (audio_path, warning_path)
+        self.shm = None
+        self.pack = None
+        self.sources = (still_path, gif_path)
+        self.background = background
+        self.cache_dir = cache_dir
+        self.frame_storage = frames
+        self.scale = 1.0      # Scale of the images loaded at startup
+        self._variants = {}   # scale -> (still_image, gif PhotoImages or None, pack or None)
+        self._packed = []     # (scale, PackedFrames) handed out, for memory_report()
+        self._gif = None      # (GIF file data, frame keys) behind packed frames
+        if bundle is not None:
+            pack = open_bundle(bundle, (still_path, gif_path, audio_path, warning_path), self.audio.mixer_format)
+            if pack is not None:
+                self.load_pack(pack)
+                return
+        if shared:
+            mixer_format = self.audio.mixer_format
+            key = sharedassets.source_key((still_path, gif_path, audio_path, warning_path),
+                                          background, mixer_format)
+            pcm_paths = (audio_path, warning_path) if mixer_format is not None else (None, None)  # No mixer, no PCM
+            self.shm, pack = sharedassets.shared_pack(
+                key, lambda: decode_assets(still_path, gif_path, *pcm_paths, background))
+            self.load_pack(pack)
+            return
+        self.sound = self.audio.load("music", audio_path)
+        self.warning_sound = self.audio.load("warning", warning_path)
+
+        # --- Load images (GIF frames once a screen asks for them, see images_at) ---
+        self._variants[self.scale] = (tk.PhotoImage(file=still_path), None, None)
+
+    def load_pack(self, pack):
+        """ Take the images and sounds from an asset pack instead of the source files. """
+        self.pack = pack
+        self.scale = round(pack.meta["scale"], 2)
+        for attr, name, path in (("sound", "music", self.audio_paths[0]),
+                                 ("warning_sound", "warning", self.audio_paths[1])):
+            if name in pack.index["sounds"]:
+                setattr(self, attr, self.audio.load(name, pcm=pack.sound(name)[0]))
+            else:
+                setattr(self, attr, self.audio.load(name, path))
+        self._variants = {self.scale: self._from_pack(pack)}
+
+    def _from_pack(self, pack):
+        return tk.PhotoImage(data=bytes(pack.frames("still")[0]), format="ppm"), None, pack
+
+    def native_height(self):
+        """ Height of the taller source image, for layout.cat_scale(). """
+        if self.pack is not None:
+            return max(height for _, height in self.pack.meta["native"].values())
+        return max(assetpack.image_size(path)[1] for path in self.sources)
+
+    def images_at(self, scale, cats=1):
+        """
+        (still_image, gif_frames) at scale x the source size. Packed frames
+        get a pool for `cats` cats plus the single cat on each call.
+        """
+        scale = round(scale, 2)  # Nearby window sizes share one variant
+        if scale not in self._variants:
+            pack = self._variant_pack(scale)
+            if pack is None:
+                scale = self.scale
+            else:
+                self._variants[scale] = self._from_pack(pack)
+        still, photos, pack = self._variants[scale]
+        if self.frame_storage == "photos":
+            if photos is None:
+                photos = pack_photos(pack) if pack is not None else load_gif_frames(self.sources[1])
+                self._variants[scale] = (still, photos, pack)
+            return still, photos
+        if pack is not None:
+            frames = PackedFrames.from_pack(pack, "spin", cats + 2)
+        else:
+            if self._gif is None:
+                with open(self.sources[1], "rb") as f:
+                    self._gif = (f.read(), assetpack.gif_frame_keys(self.sources[1]))
+            frames = PackedFrames.from_gif(*self._gif, cats + 2)
+        self._packed.append((scale, frames))
+        return still, frames
+
+    def memory_report(self):
+        """
+        Estimated memory per asset, as rows of asset, storage, frames,
+        unique and bytes. PhotoImages count 4 bytes per pixel. Mapped packs
+        live in the page cache, shared with other processes.
+        """
+        rows = []
+        for name, sound in (("music", self.sound), ("warning", self.warning_sound)):
+            rows.append({"asset": name, "storage": "PCM", "frames": 1, "unique": 1, "bytes": self.audio.size(sound)})
+        for scale, (still, photos, pack) in sorted(self._variants.items()):
+            rows.append({"asset": f"still @{scale:g}", "storage": "PhotoImage", "frames": 1, "unique": 1,
+                         "bytes": _photo_bytes(still)})
+            if photos is not None:
+                distinct = list({id(p): p for p in photos}.values())
+                rows.append({"asset": f"spin @{scale:g}", "storage": "PhotoImage", "frames": len(photos),
+                             "unique": len(distinct), "bytes": sum(map(_photo_bytes, distinct))})
+            if pack is not None:
+                rows.append({"asset": f"pack @{scale:g}", "storage": "asset pack (mapped)" if pack is self.pack or self.cache_dir
+                             else "asset pack", "frames": None, "unique": None, "bytes": pack.nbytes})
+        if self._gif is not None:
+            rows.append({"asset": "spin GIF", "storage": "GIF data", "frames": len(self._gif[1]),
+                         "unique": len(set(self._gif[1])), "bytes": len(self._gif[0])})
+        for scale, frames in self._packed:
+            expanded = list(frames._photos.values())
+            rows.append({"asset": f"spin @{scale:g}", "storage": f"packed, {len(expanded)}/{frames.pool} expanded",
+                         "frames": len(frames), "unique": frames.unique(), "bytes": sum(map(_photo_bytes, expanded))})
+        return rows
+
+    def _variant_pack(self, scale):
+        if not all(os.path.exists(path) for path in self.sources):
+            print(f"no source images to resample at scale {scale}; using scale {self.scale}", file=sys.stderr)
+            return None
+        path = None
+        if self.cache_dir:
+            key = sharedassets.source_key(self.sources, self.background, scale)
+            path = os.path.join(self.cache_dir, f"images-{key}.spins")
+            pack = open_bundle(path)
+            if pack is not None:
+                return pack
+        pack = decode_assets(*self.sources, None, None, self.background, scale=scale)
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                assetpack.write_pack(path, pack)
+            except OSError as e:
+                print(f"cannot cache resampled images: {e}", file=sys.stderr)
+        assetpack.seal(pack)
+        return assetpack.AssetPack(pack)
+
+    def music_channel(self):
+        """ The audio channel of one screen: play_loop(), stop() and play_once(). """
+        return self.audio.channel()
+
+    def close(self):
+        self.audio.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+"""
+Audio backends.
+
+A screen only ever does four things with sound: load the two sounds, loop
+the music on its own channel, stop it, and play the warning once. Every
+backend offers exactly that:
+
+    backend.load(name, path=None, pcm=None)  -> sound
+    backend.channel()                        -> channel with play_loop(sound), stop(), play_once(sound)
+    backend.size(sound), backend.mixer_format, backend.close()
+
+    PygameAudio     the pygame mixer (the normal runtime)
+    NullAudio       no device and no decoding, for tests and headless benchmarks
+    RecordingAudio  logs every call with a timestamp, then passes it on
+                    (to NullAudio unless told otherwise)
+
+    python3 main.py --audio null
+    python3 benchmark.py --audio recording    # counts redundant play/stop calls
+"""
+
+import time
+from collections import Counter
+
+AUDIO_BACKENDS = ("pygame", "null", "recording")
+
+
+class _PygameChannel:
+    __slots__ = ("channel",)
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def play_loop(self, sound):
+        self.channel.play(sound, loops=-1)
+
+    def stop(self):
+        self.channel.stop()
+
+    def play_once(self, sound):
+        sound.play()  # Any free channel, so the music keeps playing
+
+
+class PygameAudio:
+    """ The pygame mixer. Sounds are shared; each screen gets a reserved channel. """
+
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        pygame.init()
+        pygame.mixer.init()
+        self._channels = 0
+
+    @property
+    def mixer_format(self):
+        return self.pygame.mixer.get_init()
+
+    def load(self, name, path=None, pcm=None):
+        if pcm is not None:
+            return self.pygame.mixer.Sound(buffer=pcm)
+        return self.pygame.mixer.Sound(path)
+
+    def size(self, sound):
+        return len(sound.get_raw())
+
+    def channel(self):
+        """
+        A reserved mixer channel for one screen, so stopping the music on one
+        screen (Sound.stop() stops every channel) leaves the others playing.
+        """
+        mixer = self.pygame.mixer
+        index = self._channels
+        self._channels += 1
+        if mixer.get_num_channels() < self._channels + 4:
+            mixer.set_num_channels(self._channels + 8)
+        mixer.set_reserved(self._channels)
+        return _PygameChannel(mixer.Channel(index))
+
+    def close(self):
+        self.pygame.quit()
+
+
+class _NullChannel:
+    __slots__ = ()
+
+    def play_loop(self, sound):
+        pass
+
+    def stop(self):
+        pass
+
+    def play_once(self, sound):
+        pass
+
+
+class NullAudio:
+    """ Plays nothing and decodes nothing. """
+    mixer_format = None
+
+    def load(self, name, path=None, pcm=None):
+        return name
+
+    def size(self, sound):
+        return 0
+
+    def channel(self):
+        return _NullChannel()
+
+    def close(self):
+        pass
+
+
+class _RecordingChannel:
+    __slots__ = ("audio", "index", "inner", "looping")
+
+    def __init__(self, audio, index, inner):
+        self.audio = audio
+        self.index = index
+        self.inner = inner
+        self.looping = None   # Sound looping on this channel, if any
+
+    def play_loop(self, sound):
+        self.audio.record(self.index, "play_loop", sound, redundant=self.looping is sound)
+        self.looping = sound
+        self.inner.play_loop(sound)
+
+    def stop(self):
+        self.audio.record(self.index, "stop", None, redundant=self.looping is None)
+        self.looping = None
+        self.inner.stop()
+
+    def play_once(self, sound):
+        self.audio.record(self.index, "play_once", sound)
+        self.inner.play_once(sound)
+
+
+class RecordingAudio:
+    """
+    Records (time, channel, call, sound name) for every call and counts the
+    redundant ones: looping what already loops, stopping a stopped channel.
+    """
+
+    def __init__(self, inner=None, clock=None):
+        self.inner = inner or NullAudio()
+        self.clock = clock
+        self.calls = []
+        self.redundant = Counter()
+        self._names = {}      # id(sound) -> name
+        self._channels = 0
+
+    @property
+    def mixer_format(self):
+        return self.inner.mixer_format
+
+    def load(self, name, path=None, pcm=None):
+        sound = self.inner.load(name, path, pcm)
+        self._names[id(sound)] = name
+        return sound
+
+    def size(self, sound):
+        return self.inner.size(sound)
+
+    def channel(self):
+        self._channels += 1
+        return _RecordingChannel(self, self._channels - 1, self.inner.channel())
+
+    def record(self, channel, call, sound, redundant=False):
+        now = self.clock.now() if self.clock else time.monotonic()
+        self.calls.append((now, channel, call, None if sound is None else self._names.get(id(sound))))
+        if redundant:
+            self.redundant[call] += 1
+
+    def summary(self):
+        return {"calls": dict(Counter(call for _, _, call, _ in self.calls)), "redundant": dict(self.redundant)}
+
+    def close(self):
+        self.inner.close()
+
+
+def make_audio(name, clock=None):
+    """ An audio backend by its AUDIO_BACKENDS name. """
+    if name == "pygame":
+        return PygameAudio()
+    if name == "null":
+        return NullAudio()
+    if name == "recording":
+        return RecordingAudio(clock=clock)
+    raise ValueError(f"unknown audio backend {name!r} (expected one of {', '.join(AUDIO_BACKENDS)})")
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+
+"""
+SPINS performance benchmarks, runnable on a plain Linux box.
+
+    xvfb-run -a python3 benchmark.py --output bench-V1.1.json
+    python3 benchmark.py --headless                  # engine only, no display
+    python3 benchmark.py --app-dir ../V1.0 --output bench-V1.0.json
+    python3 benchmark.py --compare bench-V1.0.json bench-V1.1.json
+
+GPIO is simulated and time is virtual, so ticks and games run as fast as the
+code allows. --app-dir runs an older release (V0.9 and later) unmodified:
+lgpio is replaced by FakeLgpio, and its `after` timers and time.time() by a
+VirtualClock. Those releases have no decode step of their own and a fixed
+three-cat layout, so their results leave out "decode" and "scaling".
+
+Without a DISPLAY an Xvfb server is started when one is installed. Audio
+uses SDL's dummy driver unless SDL_AUDIODRIVER is already set; --audio null
+skips the mixer entirely, and --audio recording also counts the music
+play/stop calls of the app_games run, redundant ones separately.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from audio import AUDIO_BACKENDS, RecordingAudio, make_audio
+from clock import VirtualClock
+from gpio import FakeLgpio, SimulatedGpio
+import simulate
+
+VERSION = "V1.1"
+HERE = os.path.dirname(os.path.abspath(__file__))
+AUDIO = "pygame"  # Audio backend of the benchmarked apps, see audio.py
+APP_DIR = HERE    # Release whose main.py is benchmarked (--app-dir)
+RELEASE_START_DELAY_S = 1.8  # V1.0_build_alpha's start delay; V0.9 and V1.0 start the first round at once
+
+
+def rss_kb():
+    """ Resident set size of this process in kB (Linux), or None. """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def ensure_display():
+    """ Start Xvfb when there is no display; returns the process to stop, if any. """
+    if os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        proc = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(0.5)
+        if proc.poll() is None:
+            os.environ["DISPLAY"] = f":{number}"
+            return proc
+    return None
+
+
+def timings(fn, n):
+    """ Per-call cost of fn in microseconds. """
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(n):
+        t0 = clock()
+        fn()
+        samples.append(clock() - t0)
+    samples.sort()
+    return {
+        "calls": n,
+        "mean_us": statistics.fmean(samples) / 1000.0,
+        "p50_us": samples[n // 2] / 1000.0,
+        "p99_us": samples[min(n - 1, int(n * 0.99))] / 1000.0,
+    }
+
+
+# ------------------- App (Tk) benchmarks -------------------
+def is_release():
+    """ True when benchmarking an older release from --app-dir. """
+    return APP_DIR != HERE
+
+
+class _ClockTime:
+    """ Stands in for the time module of an older release. """
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def time(self):
+        return self.clock.now()
+
+
+_release = None  # main module of the --app-dir release, loaded once
+
+
+def release_main(clock, gpio):
+    """ The release's main.py, reading `gpio` through FakeLgpio and telling time by `clock`. """
+    global _release
+    if _release is None:
+        sys.modules["lgpio"] = FakeLgpio(gpio)
+        spec = importlib.util.spec_from_file_location("spins_release_main", os.path.join(APP_DIR, "main.py"))
+        _release = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_release)
+    _release.lgpio = FakeLgpio(gpio)
+    _release.time = _ClockTime(clock)
+    return _release
+
+
+def make_app():
+    import tkinter as tk
+    root = tk.Tk()
+    clock = VirtualClock()
+    gpio = SimulatedGpio()
+    if is_release():
+        release = release_main(clock, gpio)
+        root.after = clock.after  # The release schedules its ticks on root
+        app = release.AnimatedGifApp(root)
+        app.sensor_pins = release.SENSOR_PINS
+        app.button_pin = release.BUTTON_PIN
+        return root, app, clock, gpio
+    import main
+    app = main.AnimatedGifApp(root, clock=clock, gpio=gpio, audio=make_audio(AUDIO, clock))
+    return root, app, clock, gpio
+
+
+def start_delay_s(app):
+    """ Time from starting a game until its first round can be hit. """
+    if is_release():
+        return RELEASE_START_DELAY_S if hasattr(app, "delayed_start_new_round") else 0.0
+    return app.engine.start_delay_ms / 1000.0
+
+
+def close_app(root, app):
+    app.cleanup()
+    root.destroy()
+
+
+def bench_startup(runs):
+    """ Cold: a fresh interpreter up to a drawn window. Warm: another app in this process. """
+    probe = [sys.executable, os.path.abspath(__file__), "--startup-probe", "--audio", AUDIO, "--app-dir", APP_DIR]
+    cold = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(probe, check=True, cwd=APP_DIR)
+        cold.append(time.perf_counter() - t0)
+    warm = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        root, app, _, _ = make_app()
+        root.update()
+        warm.append(time.perf_counter() - t0)
+        close_app(root, app)
+    return {
+        "cold_ms": {"min": min(cold) * 1000, "median": statistics.median(cold) * 1000},
+        "warm_ms": {"min": min(warm) * 1000, "median": statistics.median(warm) * 1000},
+    }
+
+
+def startup_probe():
+    root, app, _, _ = make_app()
+    root.update()
+    close_app(root, app)
+
+
+def bench_decode(runs):
+    import main
+    from assets import load_gif_frames
+    root, app, _, _ = make_app()
+    samples = []
+    frames = 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        frames = len(load_gif_frames(main.ANIMATED_GIF_PATH))
+        samples.append(time.perf_counter() - t0)
+    asset_bytes = {row["asset"]: row["bytes"] for row in app.assets.memory_report()}
+    close_app(root, app)
+    return {"frames": frames, "ms": {"min": min(samples) * 1000, "median": statistics.median(samples) * 1000},
+            "asset_bytes": asset_bytes}
+
+
+def _setup_mode(mode, app, clock, gpio):
+    if mode == "single_idle":
+        pass
+    elif mode == "single_spinning":
+        gpio.press(app.button_pin)
+    elif mode == "teasing_idle":
+        app.toggle_teasing_mode()
+    elif mode == "teasing_all":
+        app.toggle_teasing_mode()
+        for pin in app.sensor_pins:
+            gpio.press(pin)
+    elif mode == "game":
+        app.toggle_game_mode()
+        clock.advance(start_delay_s(app) + 0.1)
+
+
+TICK_MODES = ("single_idle", "single_spinning", "teasing_idle", "teasing_all", "game")
+
+
+def bench_ticks(n):
+    """ Cost of one poll_inputs / update_animation tick (plus Tk redraw) per mode. """
+    results = {}
+    for mode in TICK_MODES:
+        root, app, clock, gpio = make_app()
+        _setup_mode(mode, app, clock, gpio)
+        app.poll_inputs()
+        root.update()
+        results[mode] = {
+            "poll_inputs": timings(app.poll_inputs, n),
+            "update_animation": timings(app.update_animation, n),
+            "update_animation_redraw": timings(lambda: (app.update_animation(), root.update_idletasks()), n),
+        }
+        close_app(root, app)
+    return results
+
+
+SCALING_CATS = (3, 16, 64)
+
+
+def bench_scaling(n, cat_counts=SCALING_CATS):
+    """ Tick cost (poll_inputs + update_animation) as the number of cats grows. """
+    import main
+    saved = main.SENSOR_PINS
+    results = {}
+    try:
+        for count in cat_counts:
+            main.SENSOR_PINS = list(range(100, 100 + count))
+            row = {}
+            for mode in ("teasing_one", "teasing_all", "game"):
+                root, app, clock, gpio = make_app()
+                if mode == "teasing_one":
+                    app.toggle_teasing_mode()
+                    gpio.press(main.SENSOR_PINS[-1])
+                elif mode == "teasing_all":
+                    # Cost here should grow with N: every cat spins.
+                    _setup_mode("teasing_all", app, clock, gpio)
+                else:
+                    _setup_mode("game", app, clock, gpio)
+                root.update()
+                row[mode] = timings(lambda: (app.poll_inputs(), app.update_animation()), n)
+                close_app(root, app)
+            results[str(count)] = row
+    finally:
+        main.SENSOR_PINS = saved
+    return results
+
+
+def play_game(app, clock, gpio, reaction=0.3):
+    """ Play one full game through the GPIO and polling path. """
+    if is_release():
+        return play_release_game(app, clock, gpio, reaction)
+    if app.game_mode:
+        app.reset_game()
+    else:
+        app.toggle_game_mode()
+    engine = app.engine
+    clock.advance(engine.start_delay_ms / 1000.0 + 0.05)
+    while not engine.game_over:
+        clock.advance(reaction)
+        pin = app.sensor_pins[engine.current_cat]
+        gpio.press(pin)
+        clock.advance(0.06)
+        gpio.release(pin)
+        clock.advance(engine.next_round_delay_ms / 1000.0 + 0.05)
+
+
+def play_release_game(app, clock, gpio, reaction):
+    """ play_game() for an older release: its rules live in the app itself. """
+    if app.game_mode:
+        app.reset_game()
+    else:
+        app.toggle_game_mode()
+    while not app.game_over:
+        cat = app.current_game_cat
+        if cat is None or not app.cat_spinning[cat]:  # Start delay or between rounds
+            clock.advance(0.05)
+            continue
+        clock.advance(reaction)
+        pin = app.sensor_pins[cat]
+        gpio.press(pin)
+        clock.advance(0.06)
+        gpio.release(pin)
+
+
+def bench_app_games(games):
+    """ RSS growth and throughput of whole games through the Tk app. """
+    root, app, clock, gpio = make_app()
+    play_game(app, clock, gpio)
+    root.update()
+    before = rss_kb()
+    t0 = time.perf_counter()
+    for _ in range(games):
+        play_game(app, clock, gpio)
+        root.update()
+    elapsed = time.perf_counter() - t0
+    after = rss_kb()
+    close_app(root, app)
+    results = {
+        "games": games,
+        "games_per_second": games / elapsed,
+        "rss_before_kb": before,
+        "rss_after_kb": after,
+        "rss_growth_per_game_kb": (after - before) / games if before and after else None,
+    }
+    if not is_release() and isinstance(app.assets.audio, RecordingAudio):
+        results["audio"] = app.assets.audio.summary()
+    return results
+
+
+# ------------------- Headless benchmarks -------------------
+def bench_engine(games):
+    """ Simulated games/second on the headless engine (single core). """
+    player = {"median_reaction": 0.9, "sigma": 0.35, "wrong_rate": 0.03}
+    job = (games, 1, 7, 1800, 669, player)
+    t0 = time.perf_counter()
+    simulate.run_batch(job)
+    elapsed = time.perf_counter() - t0
+    return {"games": games, "games_per_second": games / elapsed}
+
+
+def run(args):
+    results = {
+        "version": args.label,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "engine": bench_engine(args.engine_games),
+    }
+    if args.headless:
+        results["rss_kb"] = rss_kb()
+        return results
+
+    xvfb = ensure_display()
+    if not os.environ.get("DISPLAY"):
+        print("No DISPLAY and no Xvfb: run under xvfb-run or pass --headless.", file=sys.stderr)
+        sys.exit(2)
+    os.chdir(APP_DIR)  # Assets are loaded relative to the app directory
+    workdir = tempfile.mkdtemp(prefix="spins-bench-")
+    if not is_release():
+        import main
+        # Keep scores and statistics written by the benchmark out of the real files.
+        main.HISTORY_PATH = os.path.join(workdir, "history.bin")
+        main.STATS_JSON_PATH = os.path.join(workdir, "stats.json")
+        main.STATS_CSV_PATH = os.path.join(workdir, "stats.csv")
+    try:
+        results["startup"] = bench_startup(args.runs)
+        if not is_release():
+            results["decode"] = bench_decode(args.runs)
+        results["ticks"] = bench_ticks(args.ticks)
+        if not is_release():
+            results["scaling"] = bench_scaling(args.ticks)
+        results["app_games"] = bench_app_games(args.games)
+        results["rss_kb"] = rss_kb()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if xvfb:
+            xvfb.terminate()
+    return results
+
+
+def _flatten(d, prefix=""):
+    out = {}
+    for key, value in d.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = value
+    return out
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    a, b = _flatten(old), _flatten(new)
+    print(f"{'metric':<58} {old.get('version', 'old'):>12} {new.get('version', 'new'):>12} {'ratio':>7}")
+    for key in sorted(set(a) & set(b)):
+        ratio = f"{b[key] / a[key]:7.2f}" if a[key] else "      -"
+        print(f"{key:<58} {a[key]:12.2f} {b[key]:12.2f} {ratio}")
+
+
+def main(argv=None):
+    global AUDIO, APP_DIR
+    parser = argparse.ArgumentParser(description="SPINS performance benchmarks.")
+    parser.add_argument("--output", "-o", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--label", help="release label stored in the results (default: the release directory)")
+    parser.add_argument("--headless", action="store_true", help="skip benchmarks that need Tk")
+    parser.add_argument("--runs", type=int, default=5, help="startup/decode repetitions")
+    parser.add_argument("--ticks", type=int, default=2000, help="calls per tick benchmark")
+    parser.add_argument("--games", type=int, default=200, help="games played through the app")
+    parser.add_argument("--engine-games", type=int, default=20000, help="games for engine throughput")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--audio", choices=AUDIO_BACKENDS, default=AUDIO,
+                        help="audio backend of the apps; recording counts play/stop calls (see audio.py)")
+    parser.add_argument("--app-dir", default=HERE,
+                        help="benchmark the release in this directory, e.g. ../V1.0 (default: this one)")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    AUDIO = args.audio
+    APP_DIR = os.path.abspath(args.app_dir)
+    if args.headless and is_release():
+        parser.error("--headless only measures this release's engine; older releases need Tk")
+    if args.label is None:
+        args.label = VERSION if not is_release() else os.path.basename(APP_DIR)
+
+    if args.startup_probe:
+        startup_probe()
+        return 0
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
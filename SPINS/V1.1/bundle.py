@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Compile the SPINS assets into one bundle file the app memory-maps at startup.
+
+    python3 bundle.py                       # writes assets.spins next to main.py
+    python3 bundle.py --fit 3840x2160 --cats 3    # frames sized for a 4K kiosk
+    python3 bundle.py --scale 1.5 -o /opt/spins/assets.spins
+
+The bundle holds the still image and every GIF frame decoded (and scaled)
+for display, the frame durations, and both sounds as PCM in the mixer's
+format; see assetpack.py for the layout. main.py uses it whenever it is
+newer than the source files, so rebuild after changing an asset.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")  # Only the mixer format is needed, not a sound card
+
+import pygame
+
+import main
+from assetpack import AssetPack, image_size, write_pack
+from assets import decode_assets
+from layout import cat_scale
+
+
+def build(output, scale=1.0):
+    pygame.mixer.init()  # Same defaults as the app, so the PCM matches its mixer
+    meta = {
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "background": main.GREEN,
+        "sources": [os.path.basename(p) for p in (main.STILL_IMAGE_PATH, main.ANIMATED_GIF_PATH,
+                                                  main.AUDIO_FILE_PATH, main.WARNING_AUDIO_FILE_PATH)],
+    }
+    pack = decode_assets(main.STILL_IMAGE_PATH, main.ANIMATED_GIF_PATH, main.AUDIO_FILE_PATH,
+                         main.WARNING_AUDIO_FILE_PATH, main.GREEN, scale=scale, meta=meta)
+    write_pack(output, pack)
+    pygame.mixer.quit()
+    return AssetPack(pack)
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Build the SPINS asset bundle.")
+    parser.add_argument("--output", "-o", default=main.ASSET_BUNDLE_PATH)
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", type=float, default=1.0, help="resize the images by this factor")
+    size.add_argument("--fit", metavar="WxH", help="size the cats for this window, e.g. 3840x2160")
+    parser.add_argument("--cats", type=int, default=len(main.SENSOR_PINS), help="cats on screen for --fit")
+    args = parser.parse_args(argv)
+
+    scale = args.scale
+    if args.fit:
+        width, height = (int(v) for v in args.fit.lower().split("x"))
+        image_height = max(image_size(p)[1] for p in (main.STILL_IMAGE_PATH, main.ANIMATED_GIF_PATH))
+        scale = round(cat_scale(args.cats, width, height, image_height), 2)
+    t0 = time.perf_counter()
+    pack = build(args.output, scale)
+    spin = pack.image("spin")
+    music, mixer_format = pack.sound("music")
+    print(f"{args.output}: {pack.nbytes / 1e6:.1f} MB in {time.perf_counter() - t0:.2f}s")
+    print(f"  {len(spin['frames'])} frames {spin['width']}x{spin['height']} (scale {pack.meta['scale']}), "
+          f"still {pack.image('still')['width']}x{pack.image('still')['height']}")
+    print(f"  audio {mixer_format[0]} Hz, {abs(mixer_format[1])}-bit, {mixer_format[2]} channels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+from array import array
+
+
+def iter_bits(mask):
+    """ Indices of the set bits of mask, lowest first. """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CatBank:
+    """
+    Per-cat state for Teasing and Game mode in flat arrays and bitsets:
+    positions and frame indices are typed arrays, spinning/shown are int
+    bitmasks (bit i = cat i). Per-tick work walks only the set bits, so its
+    cost follows the number of spinning cats, not the number of cats.
+    """
+    __slots__ = ("n", "labels", "relx", "rely", "frames", "spinning", "shown")
+
+    def __init__(self, labels, positions):
+        self.n = len(labels)
+        self.labels = labels
+        self.relx = array("d", [x for x, _ in positions])
+        self.rely = array("d", [y for _, y in positions])
+        self.frames = array("H", [0]) * self.n   # Current GIF frame per cat
+        self.spinning = 0                         # Bit i set while cat i spins
+        self.shown = 0                            # Bit i set while cat i shows a GIF frame
+
+    def place(self):
+        for i, lbl in enumerate(self.labels):
+            lbl.place(relx=self.relx[i], rely=self.rely[i], anchor="center")
+
+    def hide(self):
+        for lbl in self.labels:
+            lbl.place_forget()
+
+    def spin_only(self, i):
+        """ Make cat i the only spinning cat, starting from its first frame. """
+        self.spinning = 1 << i
+        self.frames[i] = 0
+
+    def spin(self, i, group_mask):
+        """ Make cat i the only spinning cat within group_mask (other cats keep spinning). """
+        self.spinning = (self.spinning & ~group_mask) | (1 << i)
+        self.frames[i] = 0
+
+    def stop(self, i):
+        self.spinning &= ~(1 << i)
+
+    def stop_group(self, group_mask):
+        self.spinning &= ~group_mask
+
+    def stop_all(self):
+        self.spinning = 0
+
+    def render(self, gif_frames, still_image):
+        """ Advance and draw spinning cats; put still images on cats that just stopped. """
+        spinning = self.spinning
+        labels = self.labels
+        frames = self.frames
+        total = len(gif_frames)
+        for i in iter_bits(self.shown & ~spinning):
+            labels[i].config(image=still_image)
+        for i in iter_bits(spinning):
+            f = frames[i] + 1
+            if f == total:
+                f = 0
+            frames[i] = f
+            labels[i].config(image=gif_frames[f])
+        self.shown = spinning
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import heapq
+import itertools
+import time
+
+
+class RealClock:
+    """ Wall-clock time and Tk `after` scheduling (the normal runtime). """
+
+    def __init__(self, master):
+        self.master = master
+
+    def now(self):
+        """ Seconds from a monotonic source; only differences are meaningful. """
+        return time.monotonic()
+
+    def after(self, ms, callback, *args):
+        return self.master.after(ms, callback, *args)
+
+    def cancel(self, handle):
+        self.master.after_cancel(handle)
+
+
+class VirtualClock:
+    """
+    Simulated time for tests, simulations and benchmarks.
+    Nothing runs until the clock is advanced; callbacks fire in due order and
+    callbacks scheduled while advancing run in the same call if they fall due.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._queue = []                # heap of (due, seq, callback, args)
+        self._seq = itertools.count()   # keeps FIFO order for equal due times
+        self._cancelled = set()
+
+    def now(self):
+        return self._now
+
+    def after(self, ms, callback, *args):
+        seq = next(self._seq)
+        heapq.heappush(self._queue, (self._now + ms / 1000.0, seq, callback, args))
+        return seq
+
+    def cancel(self, handle):
+        self._cancelled.add(handle)
+
+    def next_due(self):
+        """ Due time of the next scheduled callback, or None when idle. """
+        while self._queue and self._queue[0][1] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(self._queue)[1])
+        return self._queue[0][0] if self._queue else None
+
+    def step(self):
+        """ Jump to the next due callback and run it. Returns False when idle. """
+        due = self.next_due()
+        if due is None:
+            return False
+        due, _, callback, args = heapq.heappop(self._queue)
+        if due > self._now:
+            self._now = due
+        callback(*args)
+        return True
+
+    def advance(self, seconds):
+        """ Move time forward, running every callback that falls due. """
+        self.run_until(self._now + seconds)
+
+    def run_until(self, t):
+        while True:
+            due = self.next_due()
+            if due is None or due > t:
+                break
+            self.step()
+        if t > self._now:
+            self._now = t
+
+    def run_until_idle(self, max_callbacks=None):
+        """ Run callbacks until none are left (or max_callbacks have run). """
+        count = 0
+        while (max_callbacks is None or count < max_callbacks) and self.step():
+            count += 1
+        return count
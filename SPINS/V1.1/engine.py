@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+import functools
+import random
+
+# Game Mode rules
+ROUNDS_PER_GAME = 7
+START_DELAY_MS = 1800       # Delay before the first round of a game
+NEXT_ROUND_DELAY_MS = 669   # Delay between a correct hit and the next round
+MIN_PLAYER_CATS = 2         # Versus: fewer cats per player and the target never changes
+TIE_DECIMALS = 2            # Versus: totals equal to this many decimals (as shown) are a tie
+
+
+class GameEngine:
+    """
+    Game Mode rules without any UI: a random target cat spins, hitting its
+    sensor records the reaction time, hitting any other sensor ends the game.
+
+    Inputs come in through process_inputs(); state changes go out to listeners
+    as listener(event, data) with these events:
+        "waiting"        round delay started          {"delay_ms"}
+        "round_started"  a target cat starts spinning {"cat", "round"}
+        "hit"            correct sensor hit           {"cat", "round", "elapsed"}
+        "wrong_hit"      wrong sensor hit, game over  {"cat", "target", "round"}
+        "finished"       all rounds played            {"total", "round_times", "round_cats"}
+        "stopped"        game abandoned               {}
+    """
+
+    def __init__(self, clock, n_cats=3, rounds=ROUNDS_PER_GAME,
+                 start_delay_ms=START_DELAY_MS, next_round_delay_ms=NEXT_ROUND_DELAY_MS, rng=None):
+        self.clock = clock
+        self.n_cats = n_cats
+        self.rounds = rounds
+        self.start_delay_ms = start_delay_ms
+        self.next_round_delay_ms = next_round_delay_ms
+        self.rng = rng or random.Random()
+        self.listeners = []
+
+        self.active = False              # A game is running (or showing its result)
+        self.game_over = False           # Finished or ended by a wrong hit
+        self.round_delay_active = False  # Waiting for the first round to start
+        self.current_cat = None
+        self.target_spinning = False     # Target is live (False between rounds)
+        self.round_start_time = 0.0
+        self.hits_count = 0
+        self.total_time = 0.0
+        self.round_times = []
+        self.round_cats = []
+        self._pending = None             # Scheduled round start, cancelled on stop
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _emit(self, event, **data):
+        for listener in self.listeners:
+            listener(event, data)
+
+    @property
+    def accepting_input(self):
+        """ True while sensor input can affect the game. """
+        return self.active and not self.game_over and not self.round_delay_active
+
+    # ------------------- Game flow -------------------
+    def start(self):
+        """ Start (or restart) a game: clear the score and wait before round one. """
+        self._cancel_pending()
+        self.active = True
+        self.game_over = False
+        self.current_cat = None
+        self.target_spinning = False
+        self.hits_count = 0
+        self.total_time = 0.0
+        self.round_times = []
+        self.round_cats = []
+        self.round_delay_active = True
+        self._pending = self.clock.after(self.start_delay_ms, self.delayed_start_new_round)
+        self._emit("waiting", delay_ms=self.start_delay_ms)
+
+    def stop(self):
+        self._cancel_pending()
+        was_active = self.active
+        self.active = False
+        self.game_over = False
+        self.round_delay_active = False
+        self.target_spinning = False
+        self.current_cat = None
+        if was_active:
+            self._emit("stopped")
+
+    def delayed_start_new_round(self):
+        self.round_delay_active = False
+        self.start_new_round()
+
+    def start_new_round(self):
+        self._pending = None
+        self.current_cat = self.rng.randrange(self.n_cats)
+        self.target_spinning = True
+        self.round_start_time = self.clock.now()
+        self._emit("round_started", cat=self.current_cat, round=self.hits_count + 1)
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            self.clock.cancel(self._pending)
+            self._pending = None
+
+    # ------------------- Input -------------------
+    def process_inputs(self, mask):
+        """
+        Feed one sampling pass: bit i of mask is set when sensor i is hit.
+        The target is checked first; otherwise the lowest other sensor hit
+        (including during the gap between rounds) is a wrong hit.
+        """
+        if not self.accepting_input or not mask:
+            return
+        target = self.current_cat
+        if mask >> target & 1 and self.target_spinning:
+            self.handle_cat_hit(target)
+            return
+        others = mask & ~(1 << target)
+        if others:
+            self.handle_wrong_hit((others & -others).bit_length() - 1)
+
+    def handle_cat_hit(self, cat_index):
+        self.target_spinning = False
+        elapsed = self.clock.now() - self.round_start_time
+        self.round_times.append(elapsed)
+        self.round_cats.append(cat_index)
+        self.total_time += elapsed
+        self.hits_count += 1
+        self._emit("hit", cat=cat_index, round=self.hits_count, elapsed=elapsed)
+        if self.hits_count < self.rounds:
+            self._pending = self.clock.after(self.next_round_delay_ms, self.start_new_round)
+        else:
+            self.game_over = True
+            self._emit("finished", total=self.total_time,
+                       round_times=list(self.round_times), round_cats=list(self.round_cats))
+
+    def handle_wrong_hit(self, cat_index):
+        self.target_spinning = False
+        self._cancel_pending()
+        self.game_over = True
+        self._emit("wrong_hit", cat=cat_index, target=self.current_cat, round=self.hits_count + 1)
+
+
+def can_split(n_cats, players):
+    """ True if every player gets the same number of cats, and at least two (one cat never moves the target). """
+    return players >= 1 and n_cats % players == 0 and n_cats // players >= MIN_PLAYER_CATS
+
+
+def split_sensors(n_cats, players):
+    """ Contiguous (first_cat, count) ranges giving each player an equal share of the cats. """
+    if not can_split(n_cats, players):
+        raise ValueError(f"cannot split {n_cats} sensors evenly between {players} players "
+                         f"with at least {MIN_PLAYER_CATS} each")
+    bounds = [p * n_cats // players for p in range(players + 1)]
+    return [(bounds[p], bounds[p + 1] - bounds[p]) for p in range(players)]
+
+
+class VersusGame:
+    """
+    Competitive Game Mode: one GameEngine per player, each with its own
+    sensors, target sequence, round timing and wrong-hit handling. All of
+    them share one clock and are fed from the same sampling pass.
+
+    Listeners get listener(player, event, data) with cat indices translated
+    to global cat indices, plus ("all_done", {"results"}) with player None
+    once every player has finished or hit a wrong cat.
+    """
+
+    def __init__(self, clock, n_cats, players=2, rng=None, **engine_options):
+        self.ranges = split_sensors(n_cats, players)
+        rng = rng or random.Random()
+        self.engines = []
+        for player, (_, count) in enumerate(self.ranges):
+            engine = GameEngine(clock, n_cats=count, rng=random.Random(rng.random()), **engine_options)
+            engine.subscribe(functools.partial(self._forward, player))
+            self.engines.append(engine)
+        # Bit masks selecting each player's sensors from the shared sample.
+        self.masks = [((1 << count) - 1) << first for first, count in self.ranges]
+        self.listeners = []
+        self.all_done = False
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _emit(self, player, event, data):
+        for listener in self.listeners:
+            listener(player, event, data)
+
+    def _forward(self, player, event, data):
+        first = self.ranges[player][0]
+        if "cat" in data:
+            data = dict(data, cat=data["cat"] + first)
+        if data.get("target") is not None:
+            data = dict(data, target=data["target"] + first)
+        if "round_cats" in data:
+            data = dict(data, round_cats=[c + first for c in data["round_cats"]])
+        self._emit(player, event, data)
+        if event in ("finished", "wrong_hit") and not self.all_done:
+            if all(e.game_over for e in self.engines):
+                self.all_done = True
+                self._emit(None, "all_done", {"results": self.results()})
+
+    @property
+    def accepting_input(self):
+        return any(e.accepting_input for e in self.engines)
+
+    def start(self):
+        self.all_done = False
+        for engine in self.engines:
+            engine.start()
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+
+    def process_inputs(self, mask):
+        """ One sampling pass for everybody: bit i of mask is global sensor i. """
+        for engine, (first, _), player_mask in zip(self.engines, self.ranges, self.masks):
+            if engine.accepting_input:
+                engine.process_inputs((mask & player_mask) >> first)
+
+    def results(self):
+        """ Per player: completed flag, rounds hit and total time; plus the winner. """
+        players = [
+            {
+                "player": p,
+                "completed": e.hits_count >= e.rounds,
+                "hits": e.hits_count,
+                "total": e.total_time,
+            }
+            for p, e in enumerate(self.engines)
+        ]
+        # Totals equal to the shown precision are a tie, not a win for the lower player number.
+        finishers = [r for r in players if r["completed"]]
+        best = min((round(r["total"], TIE_DECIMALS) for r in finishers), default=None)
+        leaders = [r["player"] for r in finishers if round(r["total"], TIE_DECIMALS) == best]
+        winner = leaders[0] if len(leaders) == 1 else None
+        return {"players": players, "winner": winner, "tied": leaders if len(leaders) > 1 else []}
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""
+Structured event log: mode changes, rounds, hits, wrong hits, audio
+transitions and late ticks, so an unfair-looking game can be looked at
+afterwards.
+
+The Tk thread writes each event into a preallocated ring of slots; it never
+takes a lock or touches a file. A background writer appends new events to
+a JSON Lines file once a second, and dumps the last few minutes on request:
+
+    kill -USR1 <pid>        # writes events-dump-<time>.jsonl (see install_dump_signal)
+
+If the Tk thread ever gets a whole ring ahead of the writer, the oldest
+unwritten events are dropped and counted rather than waited for. Other
+threads (the stall watchdog) log through log_threadsafe(), a small locked
+side ring the Tk thread never touches.
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 8192          # Events kept in memory (several minutes of play)
+FLUSH_S = 1.0             # The writer wakes this often
+DUMP_SECONDS = 300        # Default span of a dump
+LOG_MAX_BYTES = 10 << 20  # The log file is rotated to <path>.1 beyond this
+SIDE_RING_SIZE = 256      # Events kept from threads other than the Tk thread
+
+
+class EventSource:
+    """ Logs into an EventLog with fixed context fields, e.g. the screen. """
+    __slots__ = ("target", "context")
+
+    def __init__(self, target, context):
+        self.target = target
+        self.context = context
+
+    def log(self, kind, fields=None):
+        self.target.append(kind, fields, self.context)
+
+
+class EventLog:
+    """ Ring buffer of events, flushed to `path` (None keeps them in memory only). """
+
+    def __init__(self, path=None, clock=None, capacity=RING_SIZE, flush_s=FLUSH_S):
+        self.path = path
+        self.clock = clock
+        self.capacity = capacity
+        self.flush_s = flush_s
+        self._slots = [[0.0, None, None, None] for _ in range(capacity)]  # time, kind, fields, context
+        self.written = 0      # Events appended so far; only the Tk thread changes it
+        self.flushed = 0      # Events handled by the writer
+        self.dropped = 0      # Overwritten before the writer got to them
+        self._epoch = time.time() - self._now()  # Clock time -> unix time
+        self._side = deque(maxlen=SIDE_RING_SIZE)  # Events from other threads, same slot layout
+        self._side_written = 0
+        self._side_flushed = 0
+        self._side_lock = threading.Lock()
+        self._dumps = []      # (path, seconds) waiting for the writer
+        self._lock = threading.Lock()  # Between the writer thread and close(); log() never takes it
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = None
+        if path is not None:
+            self._thread = threading.Thread(target=self._run, name="spins-eventlog", daemon=True)
+            self._thread.start()
+
+    def _now(self):
+        return self.clock.now() if self.clock else time.monotonic()
+
+    def source(self, **context):
+        return EventSource(self, context or None)
+
+    def log(self, kind, fields=None):
+        self.append(kind, fields, None)
+
+    def append(self, kind, fields, context):
+        """ Hot path: fill the next slot, then publish it by bumping `written`. """
+        slot = self._slots[self.written % self.capacity]
+        slot[0] = self._now()
+        slot[1] = kind
+        slot[2] = fields
+        slot[3] = context
+        self.written += 1
+
+    def log_threadsafe(self, kind, fields=None):
+        """ log() for threads other than the Tk thread. """
+        with self._side_lock:
+            self._side.append((self._now(), kind, fields, None))
+            self._side_written += 1
+        self._wake.set()
+
+    # --- Reading (any thread) ---
+    def _snapshot(self, start):
+        """ Events from index `start` on, as dicts; slots lapped while copying are left out. """
+        end = self.written
+        start = max(start, end - self.capacity)
+        copied = [tuple(self._slots[i % self.capacity]) for i in range(start, end)]
+        # Slot `written % capacity` may be half overwritten for index `written`
+        # (append() bumps `written` last), so its old index is dropped too.
+        first_valid = self.written - self.capacity + 1
+        if first_valid > start:
+            copied = copied[first_valid - start:]
+            start = first_valid
+        return start, end, [self._as_dict(slot) for slot in copied]
+
+    def _side_snapshot(self, all_kept=False):
+        """ Side-ring events not yet flushed (or all still kept), marking them flushed. """
+        with self._side_lock:
+            new = len(self._side) if all_kept else min(self._side_written - self._side_flushed, len(self._side))
+            if not all_kept:
+                self._side_flushed = self._side_written
+            copied = list(self._side)[len(self._side) - new:]
+        return [self._as_dict(slot) for slot in copied]
+
+    def _as_dict(self, slot):
+        t, kind, fields, context = slot
+        event = {"t": round(t + self._epoch, 4), "event": kind}
+        if context:
+            event.update(context)
+        if fields:
+            event.update(fields)
+        return event
+
+    def recent(self, seconds=DUMP_SECONDS):
+        """ The events of the last `seconds`, oldest first. """
+        cutoff = self._now() + self._epoch - seconds
+        events = self._snapshot(0)[2] + self._side_snapshot(all_kept=True)
+        events.sort(key=lambda e: e["t"])
+        return [e for e in events if e["t"] >= cutoff]
+
+    # --- Writer ---
+    def request_dump(self, path, seconds=DUMP_SECONDS):
+        """ Have the writer save the last `seconds` of events to `path`. Never blocks. """
+        self._dumps.append((path, seconds))
+        self._wake.set()
+
+    def dump(self, path, seconds=DUMP_SECONDS):
+        events = self.recent(seconds)
+        _write_lines(path, events, "w")
+        return len(events)
+
+    def flush(self):
+        """ Append the events not yet written to the log file. """
+        if self.path is None:
+            return
+        with self._lock:
+            start, end, events = self._snapshot(self.flushed)
+            self.dropped += start - self.flushed
+            self.flushed = end
+            side = self._side_snapshot()
+            if side:
+                events = sorted(events + side, key=lambda e: e["t"])
+            if events:
+                _rotate(self.path)
+                _write_lines(self.path, events, "a")
+
+    def _run(self):
+        while not self._closing:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            try:
+                self.flush()
+                while self._dumps:
+                    self.dump(*self._dumps.pop(0))
+            except OSError:
+                pass  # A full SD card loses log lines, never the game
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+
+def _write_lines(path, events, mode):
+    with open(path, mode) as f:
+        f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events))
+
+
+def _rotate(path):
+    try:
+        if os.path.getsize(path) > LOG_MAX_BYTES:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass
+
+
+def install_dump_signal(log, directory=".", signum=getattr(signal, "SIGUSR1", None)):
+    """ Dump the last DUMP_SECONDS of events when the process gets `signum`. """
+    if signum is None:
+        return  # No SIGUSR1 on Windows
+
+    def handler(*_):
+        path = os.path.join(directory, time.strftime("events-dump-%Y%m%d-%H%M%S.jsonl"))
+        log.request_dump(path)
+
+    signal.signal(signum, handler)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from collections import OrderedDict
+
+import tkinter as tk
+
+TK_BYTES_PER_PIXEL = 4  # A PhotoImage keeps 32-bit RGBA per pixel
+
+
+class PackedFrames:
+    """
+    Animation frames kept compact (the GIF file itself, or PPM data in a
+    memory-mapped asset pack) and expanded into PhotoImages on demand.
+
+    Behaves like the list of PhotoImages that CatBank.render() and the
+    single-cat animation index into, but only the `pool` most recently used
+    frames exist as PhotoImages; older ones are recycled. Every frame on
+    screen was fetched on the latest tick, so a pool larger than the number
+    of labels that can show a frame never recycles a visible one.
+    """
+
+    def __init__(self, frames, pool):
+        self.frames = frames  # [(data, tk format, key)]; equal keys share one PhotoImage
+        self.pool = max(1, pool)
+        self._photos = OrderedDict()  # key -> PhotoImage, least recently used first
+        self.expansions = 0
+
+    @classmethod
+    def from_gif(cls, data, keys, pool):
+        """ Frames of GIF file data, decoded by Tk one at a time; keys from assetpack.gif_frame_keys(). """
+        return cls([(data, f"gif -index {i}", key) for i, key in enumerate(keys)], pool)
+
+    @classmethod
+    def from_pack(cls, pack, name, pool):
+        entry = pack.image(name)
+        return cls([(frame, "ppm", blob) for frame, blob in zip(pack.frames(name), entry["frames"])], pool)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        data, fmt, key = self.frames[index]
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            return photo
+        if len(self._photos) < self.pool:
+            photo = tk.PhotoImage()
+        else:
+            _, photo = self._photos.popitem(last=False)
+        photo.configure(data=bytes(data), format=fmt)
+        self._photos[key] = photo
+        self.expansions += 1
+        return photo
+
+    def unique(self):
+        return len({key for _, _, key in self.frames})
+
+    def compact_bytes(self):
+        """ Bytes of compact frame data (shared storage counted once). """
+        seen = {}
+        for data, _, key in self.frames:
+            seen.setdefault(id(data) if isinstance(data, bytes) else key, len(data))
+        return sum(seen.values())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+"""
+Adaptive animation frame rate.
+
+The input poll runs every 50ms no matter what; the governor measures how
+late those ticks fire and reads the SoC temperature, and when the Pi is
+overloaded or hot it slows only the animation tick, one step at a time.
+Once ticks are on time and the SoC has cooled for a few seconds it steps
+back up. While a game is running it sheds animation earlier, so reaction
+times stay accurate on a throttling SoC. In modes without an input poll the
+animation ticks are measured instead.
+"""
+
+from collections import deque
+
+ANIMATION_STEPS_MS = (50, 67, 100, 150, 200)  # 20 fps down to 5 fps
+WINDOW_S = 1.0          # Decisions are made once per window of poll ticks
+LATE_MS = 15.0          # p90 tick lateness that counts as overloaded...
+LATE_MS_GAME = 8.0      # ...and while a game is running
+RELAXED_MS = 5.0        # p90 lateness that counts as headroom
+HOT_C = 75.0            # Step down at this SoC temperature (the Pi throttles at 80)
+COOL_C = 70.0           # Only step back up below this one
+RECOVER_WINDOWS = 5     # Good windows in a row before stepping up
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+THERMAL_EVERY = 5       # Read the temperature every this many windows
+
+
+def read_temperature(path=THERMAL_ZONE):
+    """ SoC temperature in degrees C, or None where there is no thermal zone. """
+    try:
+        with open(path) as f:
+            return int(f.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+class FrameGovernor:
+    """ Picks the animation interval from poll-tick lateness and temperature. """
+
+    def __init__(self, clock, poll_ms=50, steps=ANIMATION_STEPS_MS, thermal_path=THERMAL_ZONE):
+        self.clock = clock
+        self.poll_s = poll_ms / 1000.0
+        self.steps = steps
+        self.thermal_path = thermal_path
+        self.level = 0                  # Index into steps
+        self.protect_input = False      # Set while a game is running
+        self.temperature = None
+        self.lateness_p90_ms = 0.0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.steps_down = 0
+        self.steps_up = 0
+        self.decisions = deque(maxlen=100)  # (time, from ms, to ms, reason)
+        self._last_tick = None
+        self._window_start = None
+        self._window = []               # Lateness (ms) of this window's ticks
+        self._windows = 0
+        self._good_windows = 0
+
+    @property
+    def animation_ms(self):
+        return self.steps[self.level]
+
+    def poll_tick(self):
+        """ Called at the start of every input poll; returns how late it fired (ms), if known. """
+        return self._tick(self.poll_s)
+
+    def idle_tick(self):
+        """
+        Called from the animation tick while input polling is stopped (game
+        over screens), so the governor keeps measuring and can step back up.
+        """
+        return self._tick(self.animation_ms / 1000.0)
+
+    def _tick(self, interval_s):
+        now = self.clock.now()
+        last = self._last_tick
+        self._last_tick = now
+        if last is None:
+            self._window_start = now
+            return None
+        lateness = (now - last - interval_s) * 1000.0
+        self.ticks += 1
+        if lateness > LATE_MS:
+            self.late_ticks += 1
+        self._window.append(lateness)
+        if now - self._window_start >= WINDOW_S:
+            self._decide(now)
+        return lateness
+
+    def pause(self):
+        """ Polling starts or stops; the first tick after it is not counted as late. """
+        self._last_tick = None
+
+    def _decide(self, now):
+        window = sorted(self._window)
+        self._window = []
+        self._window_start = now
+        self.lateness_p90_ms = window[int(0.9 * (len(window) - 1))]
+        if self._windows % THERMAL_EVERY == 0:
+            self.temperature = read_temperature(self.thermal_path)
+        self._windows += 1
+        hot = self.temperature is not None and self.temperature >= HOT_C
+        late = self.lateness_p90_ms > (LATE_MS_GAME if self.protect_input else LATE_MS)
+        if hot or late:
+            self._good_windows = 0
+            if self.level < len(self.steps) - 1:
+                self._set_level(self.level + 1, now, "hot" if hot else "late")
+            return
+        cool = self.temperature is None or self.temperature < COOL_C
+        if cool and self.lateness_p90_ms < RELAXED_MS:
+            self._good_windows += 1
+            if self._good_windows >= RECOVER_WINDOWS and self.level > 0:
+                self._good_windows = 0
+                self._set_level(self.level - 1, now, "headroom")
+        else:
+            self._good_windows = 0
+
+    def _set_level(self, level, now, reason):
+        if level > self.level:
+            self.steps_down += 1
+        else:
+            self.steps_up += 1
+        self.decisions.append((now, self.animation_ms, self.steps[level], reason))
+        self.level = level
+
+    def metrics(self):
+        return {
+            "animation_interval_ms": self.animation_ms,
+            "animation_fps": 1000.0 / self.animation_ms,
+            "level": self.level,
+            "steps_down": self.steps_down,
+            "steps_up": self.steps_up,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "tick_lateness_p90_ms": self.lateness_p90_ms,
+            "temperature_c": self.temperature,
+        }
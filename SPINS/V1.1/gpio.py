@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# Inputs are active low: a pressed button or a lit sensor reads 0.
+# Sensor groups are read in one call as a bitmask: bit i is set while the
+# i-th pin of the group is active (low).
+
+
+class LgpioBackend:
+    """ Real GPIO through lgpio (Raspberry Pi). """
+
+    def __init__(self, chip=0):
+        import lgpio
+        self.lgpio = lgpio
+        self.chip = lgpio.gpiochip_open(chip)
+        self._group_masks = {}  # group leader pin -> all-ones mask of the group width
+
+    def claim_inputs(self, pins):
+        for pin in pins:
+            self.lgpio.gpio_claim_input(self.chip, pin)
+
+    def claim_group(self, pins):
+        """ Claim pins as one group; returns the handle for read_group(). """
+        self.lgpio.group_claim_input(self.chip, list(pins))
+        self._group_masks[pins[0]] = (1 << len(pins)) - 1
+        return pins[0]
+
+    def read(self, pin):
+        return self.lgpio.gpio_read(self.chip, pin)
+
+    def read_group(self, group):
+        """ All pins of a group in one syscall, as an active-low bitmask. """
+        levels = self.lgpio.group_read(self.chip, group)
+        if isinstance(levels, (tuple, list)):
+            levels = levels[1]  # (status, levels)
+        return ~levels & self._group_masks[group]
+
+    def close(self):
+        self.lgpio.gpiochip_close(self.chip)
+
+
+class SimulatedGpio:
+    """
+    In-memory GPIO for benchmarks, simulations and development machines.
+    Every pin idles high; press() pulls it low until release().
+    """
+
+    def __init__(self):
+        self.levels = {}
+        self.reads = 0
+        self._bits = {}        # pin -> (group leader, bit)
+        self._group_low = {}   # group leader -> active-low bitmask
+
+    def claim_inputs(self, pins):
+        for pin in pins:
+            self.levels.setdefault(pin, 1)
+
+    def claim_group(self, pins):
+        self.claim_inputs(pins)
+        group = pins[0]
+        self._group_low[group] = 0
+        for bit, pin in enumerate(pins):
+            self._bits[pin] = (group, bit)
+            if self.levels[pin] == 0:
+                self._group_low[group] |= 1 << bit
+        return group
+
+    def read(self, pin):
+        self.reads += 1
+        return self.levels.get(pin, 1)
+
+    def read_group(self, group):
+        self.reads += 1
+        return self._group_low[group]
+
+    def set(self, pin, level):
+        self.levels[pin] = level
+        member = self._bits.get(pin)
+        if member is not None:
+            group, bit = member
+            if level:
+                self._group_low[group] &= ~(1 << bit)
+            else:
+                self._group_low[group] |= 1 << bit
+
+    def press(self, pin):
+        self.set(pin, 0)
+
+    def release(self, pin):
+        self.set(pin, 1)
+
+    def release_all(self):
+        for pin in self.levels:
+            self.set(pin, 1)
+
+    def close(self):
+        pass
+
+
+class FakeLgpio:
+    """
+    The part of lgpio's module interface older releases use, on top of a SimulatedGpio.
+    Put in sys.modules["lgpio"] it lets releases that call lgpio directly
+    (V0.9, V1.0) run unmodified, e.g. under benchmark.py --app-dir.
+    """
+
+    def __init__(self, gpio):
+        self.gpio = gpio
+
+    def gpiochip_open(self, chip):
+        return chip
+
+    def gpiochip_close(self, handle):
+        pass
+
+    def gpio_claim_input(self, handle, pin, flags=0):
+        self.gpio.claim_inputs([pin])
+        return 0
+
+    def gpio_read(self, handle, pin):
+        return self.gpio.read(pin)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import os
+import struct
+
+# One fixed-size little-endian record per round, appended when a game ends:
+# game id, game end time (unix seconds), round number (1-based), sensor pin,
+# completed flag (1 = all rounds played, 0 = ended by a wrong hit), reaction time.
+# analyze.py maps the same layout straight into a NumPy structured array.
+RECORD = struct.Struct("<IdBHBf")
+
+
+def next_game_id(path):
+    """ Returns the id following the last game stored in the history file. """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < RECORD.size:
+                return 0
+            f.seek(size - size % RECORD.size - RECORD.size)
+            game_id = RECORD.unpack(f.read(RECORD.size))[0]
+            return game_id + 1
+    except OSError:
+        return 0
+
+
+def append_game(path, game_id, ended_at, pins, round_times, completed):
+    """ Append all rounds of one game in a single write. """
+    data = b"".join(
+        RECORD.pack(game_id, ended_at, i + 1, pin, 1 if completed else 0, t)
+        for i, (pin, t) in enumerate(zip(pins, round_times))
+    )
+    if not data:
+        return
+    with open(path, "ab") as f:
+        f.write(data)
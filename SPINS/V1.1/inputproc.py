@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+"""
+GPIO sampling in a separate process.
+
+Sampling threads (sampler.py) share the GIL with Tk redraws, so a long
+redraw or a garbage collection delays their samples. ProcessGpio moves input
+sampling into its own process, optionally pinned to one core:
+
+    python3 main.py --input-process                 # any free core
+    python3 main.py --input-process --input-cpu 3   # pinned to core 3
+    kiosk config: {"input_process": true, "input_cpu": 3, "screens": [...]}
+
+The input process opens the real backend, reads every claimed pin group
+INPUT_HZ times a second and writes each change as a timestamped event into
+a ring buffer in shared memory. It has a single writer and a single reader,
+so no lock is needed:
+
+    header  events written (u64), per-group active flags, per-pin rising edges
+    slots   RING_SIZE x (sequence, time.monotonic(), mask, group)
+
+The writer fills a slot, stores its sequence number and then bumps the
+count. The UI process drains the ring whenever it reads an input. A slot
+whose sequence number is not the expected one, before and after reading
+it, is not yet written (or was overwritten) and is left alone.
+
+read_group() returns the pins that are active now plus every pin that was
+active in an event since the previous read. A hit shorter than a poll
+interval therefore still reaches the game. The input process sees every
+edge, so spins_input_edges_missed_total only counts edges lost when the
+ring overruns. spins_input_latency_seconds is the time from the sample to
+the read that consumed it.
+
+Groups of a mode that reads no sensors are not sampled
+(set_group_active(), see modes.py). The input process is this file run
+with plain `python3`, not a fork of a process running Tk and SDL, and it
+imports none of them. Commands (claim pins, stop) go over its stdin and
+stdout as JSON lines. With backend "simulated", press()/release() drive
+its simulated pins.
+"""
+
+import argparse
+import gc
+import json
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from catstate import iter_bits
+from gpio import LgpioBackend, SimulatedGpio
+from metrics import Histogram
+from pacing import Pacer
+
+INPUT_HZ = 1000           # Samples per second per pin group
+MAX_BEHIND = 10           # Periods behind after which sampling restarts its schedule
+RING_SIZE = 4096          # Events; several seconds of constant change at 1 kHz
+MAX_GROUPS = 8            # Pin groups, the individually claimed pins being group 0
+MAX_PINS = 64             # Pins per group (one u64 mask)
+LATENCY_BUCKETS_S = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+BACKENDS = {"lgpio": LgpioBackend, "simulated": SimulatedGpio}
+
+_COUNT = struct.Struct("<Q")
+_FLAG = struct.Struct("<B")
+_SLOT = struct.Struct("<QdQQ")    # sequence + 1, time, mask, group
+_FLAGS_AT = 8
+_EDGES_AT = 16
+_SLOTS_AT = _EDGES_AT + 8 * MAX_GROUPS * MAX_PINS
+
+
+def _ring_bytes(ring_size):
+    return _SLOTS_AT + _SLOT.size * ring_size
+
+
+class _InputGroup:
+    __slots__ = ("pins", "width", "mask", "latched", "edges", "seen", "latency_s", "metrics")
+
+    def __init__(self, pins, seen):
+        self.pins = list(pins)
+        self.width = len(self.pins)
+        self.mask = 0           # Levels as of the latest consumed event
+        self.latched = 0        # Pins active in an event since the previous read
+        self.edges = [0] * self.width   # Rising edges consumed from the ring, per pin
+        self.seen = seen        # Rising edges the input process saw, per pin (a view into the header)
+        self.latency_s = Histogram(LATENCY_BUCKETS_S)
+        self.metrics = None
+
+    def missed(self):
+        """ Per pin: edges the input process saw that never came out of the ring. """
+        return {pin: max(0, self.seen(bit) - e) for bit, (pin, e) in enumerate(zip(self.pins, self.edges))}
+
+
+class ProcessGpio:
+    """ A GPIO backend sampled by a separate process through a shared-memory event ring. """
+
+    def __init__(self, backend="lgpio", rate_hz=INPUT_HZ, cpu=None, ring_size=RING_SIZE):
+        self.ring_size = ring_size
+        self.shm = shared_memory.SharedMemory(create=True, size=_ring_bytes(ring_size))
+        self.buf = self.shm.buf
+        self.consumed = 0       # Events read from the ring
+        self.dropped = 0        # Events overwritten before they were read
+        self.groups = [_InputGroup((), self._seen(0))]
+        self._input_bits = {}   # Individually claimed pin -> bit in group 0
+        command = [sys.executable, os.path.abspath(__file__), self.shm.name, "--backend", backend,
+                   "--rate-hz", str(rate_hz), "--ring-size", str(ring_size)]
+        if cpu is not None:
+            command += ["--cpu", str(cpu)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            self._call("start")  # Returns once the backend is open
+        except RuntimeError:
+            self.close()
+            raise
+
+    def _call(self, *command):
+        try:
+            self.process.stdin.write(json.dumps(command) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            raise RuntimeError(f"input process exited with status {self.process.wait()}")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"input process: {reply['error']}")
+        return reply["result"]
+
+    def _seen(self, group):
+        base = _EDGES_AT + 8 * MAX_PINS * group
+        return lambda bit: _COUNT.unpack_from(self.buf, base + 8 * bit)[0]
+
+    # --- Backend interface ---
+    def claim_inputs(self, pins):
+        pins = [pin for pin in pins if pin not in self._input_bits]
+        inputs = self.groups[0]
+        for pin in pins:
+            self._input_bits[pin] = len(inputs.pins)
+            inputs.pins.append(pin)
+            inputs.edges.append(0)
+        inputs.width = len(inputs.pins)
+        self._call("claim_inputs", pins)
+
+    def claim_group(self, pins):
+        if len(pins) > MAX_PINS or len(self.groups) == MAX_GROUPS:
+            raise ValueError(f"at most {MAX_GROUPS - 1} groups of {MAX_PINS} pins")
+        index = self._call("claim_group", list(pins))
+        self.groups.append(_InputGroup(pins, self._seen(index)))
+        return index
+
+    def read(self, pin):
+        self._consume()
+        inputs = self.groups[0]
+        bit = 1 << self._input_bits[pin]
+        active = (inputs.mask | inputs.latched) & bit
+        inputs.latched &= ~bit
+        return 0 if active else 1  # Active low, as the real pins
+
+    def read_group(self, group):
+        """ Pins active now or at any time since the previous read, as a bitmask. """
+        self._consume()
+        g = self.groups[group]
+        mask = g.mask | g.latched
+        g.latched = 0
+        return mask
+
+    def set_group_active(self, group, active):
+        _FLAG.pack_into(self.buf, _FLAGS_AT + group, 1 if active else 0)
+
+    def attach_metrics(self, group, metrics):
+        """ Export the group's edge counters and input latency. """
+        g = self.groups[group]
+        g.metrics = metrics
+        metrics.inputs = g
+
+    def press(self, pin):
+        self._call("set", pin, 0)
+
+    def release(self, pin):
+        self._call("set", pin, 1)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self._call("close")
+                self.process.wait(1.0)
+            except (RuntimeError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+    # --- Ring reader ---
+    def _consume(self):
+        buf = self.buf
+        written = _COUNT.unpack_from(buf, 0)[0]
+        seq = self.consumed
+        if written - seq > self.ring_size:
+            self.dropped += written - seq - self.ring_size
+            seq = written - self.ring_size
+        if seq == written:
+            return
+        now = time.monotonic()
+        groups = self.groups
+        size = self.ring_size
+        while seq < written:
+            offset = _SLOTS_AT + _SLOT.size * (seq % size)
+            stamp, t, mask, group = _SLOT.unpack_from(buf, offset)
+            if stamp != seq + 1 or _COUNT.unpack_from(buf, offset)[0] != stamp:
+                if stamp > seq + 1:  # Overwritten while we were reading: lapped
+                    self.dropped += 1
+                    seq += 1
+                    continue
+                break  # Not visible yet; the next read gets it
+            g = groups[group]
+            rising = mask & ~g.mask
+            while rising:
+                bit = rising.bit_length() - 1
+                g.edges[bit] += 1
+                rising &= ~(1 << bit)
+            g.mask = mask
+            g.latched |= mask
+            g.latency_s.observe(now - t)
+            seq += 1
+        self.consumed = seq
+
+
+# --- Input process ---
+def _reply(result=None, error=None):
+    reply = {"error": error} if error is not None else {"result": result}
+    sys.stdout.write(json.dumps(reply) + "\n")
+    sys.stdout.flush()
+
+
+def serve(shm_name, backend, rate_hz, ring_size):
+    """ Sample every claimed pin group into the ring until told to stop or the UI process is gone. """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    resource_tracker.unregister(shm._name, "shared_memory")  # The UI process owns the segment
+    buf = shm.buf
+    commands = sys.stdin
+    try:
+        gpio = BACKENDS[backend]()
+    except Exception as error:
+        commands.readline()
+        _reply(error=f"{type(error).__name__}: {error}")
+        return 1
+    inputs = []         # Individually claimed pins (group 0)
+    groups = [None]     # Group index -> backend handle; None for group 0
+    previous = [0]
+    for group in range(MAX_GROUPS):
+        _FLAG.pack_into(buf, _FLAGS_AT + group, 1)
+    written = 0
+    gc.collect()
+    gc.freeze()
+    gc.disable()        # The loop allocates no cycles; no collector pauses between samples
+    pacer = Pacer(1.0 / rate_hz, MAX_BEHIND)
+    try:
+        while True:
+            if select.select((commands,), (), (), 0)[0]:
+                line = commands.readline()
+                if not line:
+                    return 0  # The UI process is gone
+                name, *args = json.loads(line)
+                if name == "close":
+                    _reply()
+                    return 0
+                try:
+                    result = None
+                    if name == "claim_inputs":
+                        gpio.claim_inputs(args[0])
+                        inputs.extend(args[0])
+                    elif name == "claim_group":
+                        groups.append(gpio.claim_group(args[0]))
+                        previous.append(0)
+                        result = len(groups) - 1
+                    elif name == "set":
+                        gpio.set(*args)
+                except Exception as error:
+                    _reply(error=f"{type(error).__name__}: {error}")
+                else:
+                    _reply(result)
+            now = time.monotonic()
+            for index, handle in enumerate(groups):
+                if not buf[_FLAGS_AT + index]:
+                    continue
+                if handle is None:
+                    mask = 0
+                    for bit, pin in enumerate(inputs):
+                        if gpio.read(pin) == 0:
+                            mask |= 1 << bit
+                else:
+                    mask = gpio.read_group(handle)
+                if mask == previous[index]:
+                    continue
+                rising = mask & ~previous[index]
+                previous[index] = mask
+                base = _EDGES_AT + 8 * MAX_PINS * index
+                for bit in iter_bits(rising):
+                    at = base + 8 * bit
+                    _COUNT.pack_into(buf, at, _COUNT.unpack_from(buf, at)[0] + 1)
+                offset = _SLOTS_AT + _SLOT.size * (written % ring_size)
+                _SLOT.pack_into(buf, offset, 0, now, mask, index)  # Invalid while being filled
+                _COUNT.pack_into(buf, offset, written + 1)         # ...then published
+                written += 1
+                _COUNT.pack_into(buf, 0, written)
+            pacer.wait()
+    except BrokenPipeError:
+        return 0  # The UI process is gone
+    finally:
+        buf = None
+        gpio.close()
+        shm.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SPINS input process (started by ProcessGpio).")
+    parser.add_argument("shm_name")
+    parser.add_argument("--backend", choices=BACKENDS, default="lgpio")
+    parser.add_argument("--rate-hz", type=int, default=INPUT_HZ)
+    parser.add_argument("--ring-size", type=int, default=RING_SIZE)
+    parser.add_argument("--cpu", type=int, help="pin the process to this CPU core")
+    args = parser.parse_args(argv)
+    if args.cpu is not None:
+        os.sched_setaffinity(0, {args.cpu})
+    return serve(args.shm_name, args.backend, args.rate_hz, args.ring_size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+"""
+Run several SPINS screens from one process.
+
+    python3 kiosk.py kiosk.json
+
+kiosk.json lists the screens; each gets its own window, GPIO pins and
+starting mode, e.g.
+
+    {"screens": [
+        {"sensor_pins": [21, 20, 2], "button_pin": 18, "mode": "teasing",
+         "geometry": "1280x720+0+0"},
+        {"sensor_pins": [16, 12, 7], "button_pin": 23, "mode": "game",
+         "geometry": "1280x720+1280+0", "screen": ":0.1"}
+    ]}
+
+The GIF frames and sounds are decoded once and shared by every window, so
+each extra screen only costs its widgets. Every screen logs to one
+events.jsonl and one watchdog watches all of them.
+
+Per screen:
+
+    sensor_pins, button_pin   its GPIO pins
+    mode                      single, teasing, game or versus at start
+    geometry                  window size and position
+    screen                    X screen to open the window on, e.g. ":0.1"
+    name                      label in metrics and events (default: position)
+
+Top level (all optional):
+
+    shared_assets    share decoded assets with other processes (sharedassets.py)
+    frames           "packed" keeps GIF frames compact (framestore.py)
+    metrics_port     serve Prometheus metrics for every screen (metrics.py)
+    stall_ms         log mainloop stalls this many ms past a due tick (watchdog.py)
+    sample_hz        sample the sensors this often and reject flicker (sampler.py)
+    flicker_filter   false: with sample_hz, only count missed pulses
+    audio            "null" runs without a sound device (audio.py)
+    runtime          "asyncio" pumps every window from asyncio (aioruntime.py)
+    input_process    sample GPIO in a separate process (inputproc.py);
+                     not together with sample_hz
+    input_cpu        pin the input process to this CPU core
+"""
+
+import json
+import sys
+import tkinter as tk
+
+import main
+from audio import make_audio
+from engine import MIN_PLAYER_CATS, can_split
+from eventlog import EventLog, install_dump_signal
+from gpio import LgpioBackend
+from inputproc import ProcessGpio
+from metrics import MetricsExporter, MetricsServer
+from sampler import SampledGpio
+from watchdog import STALL_MARGIN_MS, Watchdog
+
+MODE_TOGGLES = {
+    "single": None,
+    "teasing": "toggle_teasing_mode",
+    "game": "toggle_game_mode",
+    "versus": "toggle_versus_mode",
+}
+
+
+class Kiosk:
+    """ Owns the shared GPIO chip, assets and statistics for all screens. """
+
+    def __init__(self, root, screens, gpio=None, shared_assets=False, frames=main.FRAME_STORAGE,
+                 metrics_port=None, stall_ms=STALL_MARGIN_MS, sample_hz=0,
+                 flicker_filter=True, audio="pygame", runtime=None, input_process=False, input_cpu=None):
+        if input_process and sample_hz:
+            raise ValueError('"input_process" and "sample_hz" are alternatives')
+        self.root = root
+        self.runtime = runtime  # AsyncioRuntime, or None for Tk's mainloop
+        if input_process:
+            self.gpio = gpio or ProcessGpio(cpu=input_cpu)
+        else:
+            self.gpio = gpio or LgpioBackend()
+            if sample_hz:
+                self.gpio = SampledGpio(self.gpio, sample_hz, filter=flicker_filter)
+        self.assets = main.default_assets(shared=shared_assets, frames=frames, audio=make_audio(audio))
+        self.analytics = main.load_stats()
+        self.events = EventLog(main.EVENT_LOG_PATH)
+        install_dump_signal(self.events)
+        self.watchdog = Watchdog(self.events, interval_ms=main.POLL_MS, margin_ms=stall_ms)
+        self.exporter = MetricsExporter()
+        self.exporter.watchdog = self.watchdog
+        self.metrics_server = None
+        if metrics_port is not None:
+            if runtime:
+                runtime.serve_metrics(self.exporter, metrics_port)
+            else:
+                self.metrics_server = MetricsServer(self.exporter, metrics_port)
+        self.apps = []
+        for config in screens:
+            self.add_screen(config)
+
+    def add_screen(self, config):
+        mode = config.get("mode", "single")
+        if mode not in MODE_TOGGLES:
+            raise ValueError(f"unknown mode {mode!r} (expected one of {', '.join(MODE_TOGGLES)})")
+        name = str(config.get("name", len(self.apps)))
+        sensor_pins = config.get("sensor_pins", main.SENSOR_PINS)
+        if mode == "versus" and not (main.VERSUS_PLAYERS > 1 and can_split(len(sensor_pins), main.VERSUS_PLAYERS)):
+            raise ValueError(f"screen {name}: versus needs pins that split into {MIN_PLAYER_CATS}+ cats per player")
+        options = {}
+        if "screen" in config:
+            options["screen"] = config["screen"]
+        window = tk.Toplevel(self.root, **options)
+        app = main.AnimatedGifApp(
+            window,
+            gpio=self.gpio,
+            assets=self.assets,
+            analytics=self.analytics,
+            button_pin=config.get("button_pin", main.BUTTON_PIN),
+            sensor_pins=sensor_pins,
+            geometry=config.get("geometry", "1280x720"),
+            events=self.events.source(screen=name),
+            watchdog=self.watchdog,
+            clock=self.runtime.clock if self.runtime else None,
+            io=self.runtime.io if self.runtime else None,
+        )
+        if MODE_TOGGLES[mode]:
+            getattr(app, MODE_TOGGLES[mode])()
+        self.exporter.add(app.metrics, screen=name)
+        window.protocol("WM_DELETE_WINDOW", lambda: self.close_screen(app))
+        self.apps.append(app)
+        return app
+
+    def close_screen(self, app):
+        self.exporter.remove(app.metrics)
+        app.cleanup()
+        app.master.destroy()
+        self.apps.remove(app)
+        if not self.apps:
+            self.close()
+
+    def close(self):
+        self.watchdog.close()
+        for app in list(self.apps):
+            app.cleanup()
+        self.apps = []
+        if self.metrics_server:
+            self.metrics_server.close()
+        self.gpio.close()
+        self.assets.close()
+        self.events.close()
+        self.root.destroy()
+        if self.runtime:
+            self.runtime.stop()
+
+
+def run(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    with open(argv[0]) as f:
+        config = json.load(f)
+    root = tk.Tk()
+    root.withdraw()  # Only the per-screen Toplevels are shown
+    runtime = None
+    if config.get("runtime", "tk") == "asyncio":
+        from aioruntime import AsyncioRuntime
+        runtime = AsyncioRuntime(root)
+    Kiosk(root, config["screens"], shared_assets=config.get("shared_assets", False),
+          frames=config.get("frames", main.FRAME_STORAGE), metrics_port=config.get("metrics_port"),
+          stall_ms=config.get("stall_ms", STALL_MARGIN_MS), sample_hz=config.get("sample_hz", 0),
+          flicker_filter=config.get("flicker_filter", True), audio=config.get("audio", "pygame"),
+          runtime=runtime, input_process=config.get("input_process", False),
+          input_cpu=config.get("input_cpu"))
+    if runtime:
+        runtime.run()
+    else:
+        root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
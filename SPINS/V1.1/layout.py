@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import math
+
+ASPECT = 16 / 9     # Window aspect ratio (1280x720)
+MARGIN_X = 0.05     # Left/right margin as a fraction of the window
+TOP = 0.12          # Leave room for the mode buttons when there are several rows
+BOTTOM = 0.97
+REFERENCE_WINDOW = (1280, 720)  # The GIF's native size is drawn for three cats in this window
+REFERENCE_CATS = 3
+
+
+def grid_shape(n, aspect=ASPECT):
+    """ Columns and rows for n cats, keeping cells roughly square on screen. """
+    if n <= 0:
+        return 0, 0
+    cols = min(n, max(1, math.ceil(math.sqrt(n * aspect))))
+    rows = math.ceil(n / cols)
+    return cols, rows
+
+
+def grid_positions(n, aspect=ASPECT):
+    """
+    Relative (relx, rely) centres for n cats laid out in a grid, row by row.
+    Three cats give the classic 0.2 / 0.5 / 0.8 row.
+    """
+    cols, rows = grid_shape(n, aspect)
+    if n <= 0:
+        return []
+    cell_w = (1.0 - 2 * MARGIN_X) / cols
+    if rows == 1:
+        ys = [0.5]
+    else:
+        cell_h = (BOTTOM - TOP) / rows
+        ys = [TOP + (r + 0.5) * cell_h for r in range(rows)]
+    positions = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        # Centre a partially filled last row.
+        in_row = min(cols, n - r * cols)
+        offset = (cols - in_row) * cell_w / 2
+        positions.append((MARGIN_X + offset + (c + 0.5) * cell_w, ys[r]))
+    return positions
+
+
+def cell_size(n, width, height):
+    """ Pixel size of one grid cell for n cats in a width x height window. """
+    cols, rows = grid_shape(n, width / height)
+    if n <= 0:
+        return 0, 0
+    return width * (1.0 - 2 * MARGIN_X) / cols, height * (BOTTOM - TOP) / rows
+
+
+def cat_scale(n, width, height, image_height):
+    """
+    How much to scale the cat images so n cats fill a width x height window
+    as wide as three native-size cats fill 1280x720 (1.5 at 1080p, 3.0 at 4K),
+    without an image_height tall image overflowing its cell.
+    """
+    ref_w, _ = cell_size(REFERENCE_CATS, *REFERENCE_WINDOW)
+    cell_w, cell_h = cell_size(n, width, height)
+    return min(cell_w / ref_w, cell_h / image_height)
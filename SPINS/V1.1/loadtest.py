@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic load test: how many sensor hits per second can one SPINS screen
+keep up with?
+
+    xvfb-run -a python3 loadtest.py                         # teasing + game, every pattern
+    python3 loadtest.py --mode teasing --pattern bursty --cats 16 --max-rate 64
+    python3 loadtest.py --output load-pi4.json
+
+The real app runs its Tk mainloop on the real clock; a LoopbackGpio stands
+in for the sensors and a generator thread drives it in real time, like
+players would. Patterns:
+
+    random       hits at random times (Poisson) on random free sensors
+    bursty       bursts of BURST hits 25ms apart, then quiet
+    adversarial  random times, every free sensor at once
+
+In Game Mode the hits go to the current target (adversarial: the target
+and every other sensor, so hits between rounds end the game), and a new
+game is started whenever one ends. Each hit holds a sensor for PULSE_MS
+and a sensor rests as long before its next hit, so a hit can only be
+missed when the poll loop falls behind.
+
+The rate doubles every STEP_S until a step drops more than DROP_LIMIT of
+its hits (no poll read the sensor while it was held) or more than
+LATE_LIMIT of the poll ticks run late; the last rate before that is the
+maximum sustained rate. Music starts/stops per second are reported as
+well; more than AUDIO_THRASH_PER_S means update_music is
+restarting the music audibly often.
+"""
+
+import argparse
+import collections
+import heapq
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from benchmark import ensure_display
+from gpio import SimulatedGpio
+
+PULSE_MS = 100
+BURST = 8
+BURST_SPACING_S = 0.025
+STEP_S = 10.0
+START_RATE = 1.0
+MAX_RATE = 64.0
+DROP_LIMIT = 0.01
+LATE_LIMIT = 0.05
+AUDIO_THRASH_PER_S = 4.0
+MODES = ("teasing", "game")
+PATTERNS = ("random", "bursty", "adversarial")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopbackGpio(SimulatedGpio):
+    """ SimulatedGpio that counts the poll path's group reads. """
+
+    def __init__(self):
+        super().__init__()
+        self.group_reads = 0
+
+    def read_group(self, group):
+        self.group_reads += 1
+        return super().read_group(group)
+
+
+def pulse_starts(pattern, rate, duration, rng):
+    """ Start times (s from the start of the step) of one step's hits. """
+    times = []
+    if pattern == "bursty":
+        t = rng.uniform(0.0, BURST / rate)
+        while t < duration:
+            times.extend(t + i * BURST_SPACING_S for i in range(BURST))
+            t += BURST / rate
+    else:
+        t = rng.expovariate(rate)
+        while t < duration:
+            times.append(t)
+            t += rng.expovariate(rate)
+    return [t for t in times if t < duration]
+
+
+class HitGenerator(threading.Thread):
+    """ Plays one step's hits on the GPIO in real time and checks each was seen by a poll. """
+
+    def __init__(self, app, gpio, mode, pattern, rate, duration, rng):
+        super().__init__(name="spins-loadgen", daemon=True)
+        self.app = app
+        self.gpio = gpio
+        self.mode = mode
+        self.pattern = pattern
+        self.starts = pulse_starts(pattern, rate, duration, rng)
+        self.rng = rng
+        self.hits = 0         # Sensor activations delivered
+        self.skipped = 0      # Pattern hits with no free sensor
+        self.expected = 0     # Activations the app was reading for...
+        self.dropped = 0      # ...that no poll read saw
+
+    def _pins_for_hit(self, now, free_at):
+        pins = self.app.sensor_pins
+        free = [p for p in pins if free_at[p] <= now]
+        if self.mode == "game":
+            cat = self.app.engine.current_cat
+            target = pins[cat] if cat is not None else None
+            if target not in free:
+                return []
+            return free if self.pattern == "adversarial" else [target]
+        if not free:
+            return []
+        return free if self.pattern == "adversarial" else [self.rng.choice(free)]
+
+    def _reading(self):
+        return self.mode != "game" or self.app.engine.accepting_input
+
+    def run(self):
+        pulse_s = PULSE_MS / 1000.0
+        free_at = collections.defaultdict(float)
+        releases = []         # heap of (time, seq, pins, group reads at press, app was reading at press)
+        starts = collections.deque(self.starts)
+        t0 = time.perf_counter()
+        seq = 0
+        while starts or releases:
+            due = min(starts[0] if starts else float("inf"), releases[0][0] if releases else float("inf"))
+            delay = t0 + due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter() - t0
+            if releases and releases[0][0] <= due:
+                _, _, pins, reads, reading = heapq.heappop(releases)
+                for pin in pins:
+                    self.gpio.release(pin)
+                    free_at[pin] = now + pulse_s
+                if reading and self._reading():
+                    self.expected += len(pins)
+                    if self.gpio.group_reads == reads:
+                        self.dropped += len(pins)
+                continue
+            starts.popleft()
+            pins = self._pins_for_hit(now, free_at)
+            if not pins:
+                self.skipped += 1
+                continue
+            for pin in pins:
+                self.gpio.press(pin)
+                free_at[pin] = float("inf")
+            self.hits += len(pins)
+            seq += 1
+            heapq.heappush(releases, (now + pulse_s, seq, pins, self.gpio.group_reads, self._reading()))
+
+
+def run_for(root, seconds):
+    root.after(int(seconds * 1000), root.quit)
+    root.mainloop()
+
+
+def _lateness_p99(before, after, bounds):
+    """ Upper bucket bound (ms) holding the 99th percentile of the step's tick lateness. """
+    counts = [b - a for a, b in zip(before, after)]
+    total = sum(counts)
+    if not total:
+        return 0.0
+    seen = 0
+    for bound, count in zip(bounds + (float("inf"),), counts):
+        seen += count
+        if seen >= 0.99 * total:
+            return bound
+    return float("inf")
+
+
+def run_step(root, app, gpio, mode, pattern, rate, step_s, rng):
+    m = app.metrics
+    before = (m.poll_ticks, app.governor.late_ticks, m.audio_starts + m.audio_stops, m.games,
+              list(m.tick_lateness_ms.counts))
+    generator = HitGenerator(app, gpio, mode, pattern, rate, step_s, rng)
+    started = time.perf_counter()
+    generator.start()
+
+    def restart_games():
+        if app.engine.game_over:
+            app.reset_game()
+        if generator.is_alive():
+            root.after(200, restart_games)
+
+    if mode == "game":
+        restart_games()
+    while generator.is_alive():
+        run_for(root, 0.25)
+    elapsed = time.perf_counter() - started
+    gpio.release_all()
+    run_for(root, 0.2)  # Let the app see the releases before the next step
+
+    ticks = m.poll_ticks - before[0]
+    late = app.governor.late_ticks - before[1]
+    audio = m.audio_starts + m.audio_stops - before[2]
+    return {
+        "rate": rate,
+        "hits_per_s": generator.hits / elapsed,
+        "skipped": generator.skipped,
+        "expected": generator.expected,
+        "dropped": generator.dropped,
+        "drop_ratio": generator.dropped / generator.expected if generator.expected else 0.0,
+        "late_ratio": late / ticks if ticks else 0.0,
+        "lateness_p99_ms": _lateness_p99(before[4], m.tick_lateness_ms.counts, m.tick_lateness_ms.bounds),
+        "audio_toggles_per_s": audio / elapsed,
+        "games": m.games - before[3],
+        "animation_ms": app.governor.animation_ms,
+    }
+
+
+def run_scenario(mode, pattern, args):
+    import tkinter as tk
+    import main
+    root = tk.Tk()
+    gpio = LoopbackGpio()
+    app = main.AnimatedGifApp(root, gpio=gpio)
+    if mode == "teasing":
+        app.toggle_teasing_mode()
+    else:
+        app.toggle_game_mode()
+    run_for(root, 0.5)
+    rng = random.Random(args.seed)
+    steps = []
+    sustained = thrash = None
+    rate = args.start_rate
+    while rate <= args.max_rate:
+        step = run_step(root, app, gpio, mode, pattern, rate, args.step_s, rng)
+        ok = step["drop_ratio"] <= DROP_LIMIT and step["late_ratio"] <= LATE_LIMIT
+        step["ok"] = ok
+        steps.append(step)
+        print(f"  {mode:8} {pattern:12} {rate:6.1f}/s  delivered {step['hits_per_s']:6.1f}/s  "
+              f"dropped {step['drop_ratio']:6.1%}  late {step['late_ratio']:6.1%}  "
+              f"p99 {step['lateness_p99_ms']:>5} ms  audio {step['audio_toggles_per_s']:5.1f}/s"
+              f"{'' if ok else '  <- limit'}", flush=True)
+        if thrash is None and step["audio_toggles_per_s"] > AUDIO_THRASH_PER_S:
+            thrash = step["hits_per_s"]
+        if not ok:
+            break
+        sustained = step["hits_per_s"]
+        rate *= 2
+    app.cleanup()
+    root.destroy()
+    return {"steps": steps, "max_sustained_hits_per_s": sustained, "limit_reached": not steps[-1]["ok"],
+            "audio_thrash_from_hits_per_s": thrash}
+
+
+def run(args):
+    xvfb = ensure_display()
+    if not os.environ.get("DISPLAY"):
+        print("No DISPLAY and no Xvfb: run under xvfb-run.", file=sys.stderr)
+        sys.exit(2)
+    os.chdir(HERE)
+    workdir = tempfile.mkdtemp(prefix="spins-load-")
+    import main
+    main.HISTORY_PATH = os.path.join(workdir, "history.bin")
+    main.STATS_JSON_PATH = os.path.join(workdir, "stats.json")
+    main.STATS_CSV_PATH = os.path.join(workdir, "stats.csv")
+    saved = main.SENSOR_PINS
+    main.SENSOR_PINS = list(range(100, 100 + args.cats))
+    results = {"cats": args.cats, "pulse_ms": PULSE_MS, "step_s": args.step_s, "scenarios": {}}
+    try:
+        for mode in args.mode:
+            for pattern in args.pattern:
+                results["scenarios"][f"{mode}/{pattern}"] = run_scenario(mode, pattern, args)
+    finally:
+        main.SENSOR_PINS = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+        if xvfb:
+            xvfb.terminate()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SPINS sustained hit-rate load test.")
+    parser.add_argument("--mode", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--pattern", nargs="+", choices=PATTERNS, default=list(PATTERNS))
+    parser.add_argument("--cats", type=int, default=3, help="sensors on the screen")
+    parser.add_argument("--start-rate", type=float, default=START_RATE, help="hits per second of the first step")
+    parser.add_argument("--max-rate", type=float, default=MAX_RATE)
+    parser.add_argument("--step-s", type=float, default=STEP_S, help="seconds per rate step")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", "-o", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+    results = run(args)
+    print()
+    for name, scenario in results["scenarios"].items():
+        sustained = scenario["max_sustained_hits_per_s"]
+        thrash = scenario["audio_thrash_from_hits_per_s"]
+        if sustained is None:
+            sustained = "-"
+        else:  # Without a failing step the limit lies beyond the highest rate tried
+            sustained = f"{'' if scenario['limit_reached'] else '>= '}{sustained:.1f}"
+        print(f"{name:22} max sustained {sustained} hits/s"
+              f"   audio thrash from {'-' if thrash is None else f'{thrash:.1f}'} hits/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
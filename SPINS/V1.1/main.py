@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+
+import argparse
+import copy
+import os
+import tkinter as tk
+import time
+
+import history
+from analytics import ReactionAnalytics
+from assets import FRAME_STORAGE_MODES, AssetStore, format_memory_report
+from audio import make_audio
+from catstate import CatBank
+from clock import RealClock
+from engine import GameEngine, VersusGame, can_split
+from eventlog import EventLog, install_dump_signal
+from governor import LATE_MS, FrameGovernor
+from metrics import AppMetrics, MetricsExporter, MetricsServer
+from gpio import LgpioBackend
+from inputproc import ProcessGpio
+from sampler import SampledGpio
+from watchdog import STALL_MARGIN_MS, Watchdog
+from layout import cat_scale, grid_positions
+from modes import GameMode, GameOverMode, SingleMode, TeasingMode, VersusMode
+
+# Pin definitions
+BUTTON_PIN = 18
+SENSOR_PINS = [21, 20, 2]
+VERSUS_PLAYERS = 2  # Versus mode splits SENSOR_PINS evenly between this many players (at least 2 cats each)
+POLL_MS = 50        # Input sampling interval; the frame governor never slows it
+
+# File paths and colors (assets next to this file, data in the working directory)
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+STILL_IMAGE_PATH = os.path.join(ASSET_DIR, "oiia.png")
+ANIMATED_GIF_PATH = os.path.join(ASSET_DIR, "oiia_spin.gif")
+AUDIO_FILE_PATH = os.path.join(ASSET_DIR, "oiia-short.mp3")
+WARNING_AUDIO_FILE_PATH = os.path.join(ASSET_DIR, "warning.mp3")  # Warning sound for wrong hit
+ASSET_BUNDLE_PATH = os.path.join(ASSET_DIR, "assets.spins")  # Pre-decoded assets, see bundle.py
+ASSET_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "spins")  # Resampled frames
+STATS_JSON_PATH = "stats.json"
+STATS_CSV_PATH = "stats.csv"
+HISTORY_PATH = "history.bin"  # Per-round history, see analyze.py
+EVENT_LOG_PATH = "events.jsonl"  # Structured event log, see eventlog.py
+GREEN = "#40FF00"
+FRAME_STORAGE = "photos"  # "packed" expands GIF frames on demand, for low-RAM units (see framestore.py)
+
+def default_assets(shared=False, frames=FRAME_STORAGE, audio=None):
+    """ The bundle when there is a current one, else the decoded source files. """
+    return AssetStore(STILL_IMAGE_PATH, ANIMATED_GIF_PATH, AUDIO_FILE_PATH, WARNING_AUDIO_FILE_PATH,
+                      shared=shared, background=GREEN, bundle=ASSET_BUNDLE_PATH, cache_dir=ASSET_CACHE_DIR,
+                      frames=frames, audio=audio)
+
+class AnimatedGifApp:
+    """
+    One SPINS screen. master may be the Tk root or a Toplevel; several screens
+    can run in one process (see kiosk.py) sharing the GPIO backend, the
+    decoded assets and the statistics.
+    """
+
+    def __init__(self, master, clock=None, gpio=None, assets=None, analytics=None,
+                 button_pin=None, sensor_pins=None, geometry="1280x720", events=None, watchdog=None,
+                 audio=None, io=None):
+        self.master = master
+        # All game timing and scheduling goes through the clock so it can be virtual.
+        self.clock = clock or RealClock(master)
+        self.master.title("Spinning Pi-based Interactive Nonsensical System(SPINS)")
+        self.master.configure(bg=GREEN)
+        if geometry == "auto":  # Fill the whole screen
+            geometry = f"{master.winfo_screenwidth()}x{master.winfo_screenheight()}+0+0"
+        self.master.geometry(geometry)
+        width, height = (int(v) for v in geometry.split("+")[0].split("x"))
+        self.master.resizable(False, False)
+
+        # --- Setup GPIO (lgpio unless a simulated backend is passed in) ---
+        self.button_pin = BUTTON_PIN if button_pin is None else button_pin
+        self.sensor_pins = list(sensor_pins or SENSOR_PINS)
+        self.owns_gpio = gpio is None
+        self.gpio = gpio or LgpioBackend()
+        self.gpio.claim_inputs([self.button_pin])
+        self.sensor_group = self.gpio.claim_group(self.sensor_pins)  # read as one bitmask
+        self.n_cats = len(self.sensor_pins)
+        self.last_sensors = 0  # Latest sensor bitmask, to log changes only
+
+        # --- Audio and images (decoded once per process, shared between screens) ---
+        # audio is an audio.py backend for assets created here; passed-in assets bring their own
+        self.owns_assets = assets is None
+        self.assets = assets or default_assets(audio=audio)
+        self.sound = self.assets.sound
+        self.warning_sound = self.assets.warning_sound
+        self.music_channel = self.assets.music_channel()
+        self.sound_playing = False  # tracks if audio is playing
+        # Frames pre-scaled for this window and cat count, so nothing is resampled per frame
+        scale = cat_scale(self.n_cats, width, height, self.assets.native_height())
+        self.still_image, self.gif_frames = self.assets.images_at(scale, self.n_cats)
+        self.total_frames = len(self.gif_frames)
+
+        # ----- Modes: exactly one is active, each with its own input tick (see modes.py) -----
+        self.modes = {mode.name: mode for mode in (
+            SingleMode(self, POLL_MS), TeasingMode(self, POLL_MS), GameMode(self, POLL_MS),
+            GameOverMode(self, None), VersusMode(self, POLL_MS))}
+        self.mode = self.modes["single"]
+        self._poll_handle = None      # Pending input tick, cancelled when a mode stops polling
+        self._animation_handle = None  # Pending animation tick, cancelled by cleanup()
+
+        # For Game Mode: the rules live in the engine, the app renders its events.
+        self.engine = GameEngine(self.clock, n_cats=self.n_cats)
+        self.engine.subscribe(self.on_game_event)
+        # Versus mode: one engine per player, fed from the same sampling pass.
+        self.versus = None
+        if VERSUS_PLAYERS > 1 and can_split(self.n_cats, VERSUS_PLAYERS):
+            self.versus = VersusGame(self.clock, self.n_cats, players=VERSUS_PLAYERS)
+            self.versus.subscribe(self.on_versus_event)
+        self.player_labels = []
+
+        # Persistent Scoreboard Storage
+        self.scores = []  # List to store total times of completed games
+        self.scoreboard_frame = None  # To store the scoreboard frame
+
+        # Animation rate follows CPU headroom and SoC temperature; input polling stays at POLL_MS
+        self.governor = FrameGovernor(self.clock, poll_ms=POLL_MS)
+        # Runtime counters, read by the metrics endpoint when one is running
+        self.metrics = AppMetrics(self.governor)
+        if hasattr(self.gpio, "attach_metrics"):  # Sampled sensors (see sampler.py)
+            self.gpio.attach_metrics(self.sensor_group, self.metrics)
+        if hasattr(self.gpio, "set_group_active"):  # Sampled only in modes that read the sensors
+            self.gpio.set_group_active(self.sensor_group, "sensors" in self.mode.inputs)
+        # Mode changes, rounds, hits, audio and late ticks (memory only unless a log is passed in)
+        self.events = events or EventLog(clock=self.clock, capacity=1024)
+        # Beaten by both ticks; catches callbacks that block the mainloop (see watchdog.py)
+        self.watchdog = watchdog
+
+        # Streaming reaction-time statistics (per sensor / per round), carried over from stats.json
+        self.analytics = analytics or load_stats()
+        # Runs history and statistics writes off the tick path when set (see aioruntime.py)
+        self.io = io
+
+        # --- Display Setup ---
+        # Single-cat display (center)
+        self.image_label = tk.Label(self.master, image=self.still_image, bg=GREEN)
+        self.image_label.place(relx=0.5, rely=0.5, anchor="center")
+
+        # Teasing / Game mode display: one cat label per sensor, in a grid
+        cat_labels = [tk.Label(self.master, image=self.still_image, bg=GREEN) for _ in range(self.n_cats)]
+        self.cats = CatBank(cat_labels, grid_positions(self.n_cats, width / height))
+
+        # --- Mode Toggle Buttons ---
+        # Teasing Mode toggle button (top-right)
+        self.tease_button = tk.Button(
+            self.master,
+            text="Teasing Mode",
+            command=self.toggle_teasing_mode,
+            font=("Arial", 13, "bold")
+        )
+        self.tease_button.place(relx=1.0, rely=0.0, anchor="ne", x=-10, y=10)
+
+        # Game Mode button (top-left)
+        self.game_button = tk.Button(
+            self.master,
+            text="Play With Cats",
+            command=self.toggle_game_mode,
+            font=("Arial", 13, "bold")
+        )
+        self.game_button.place(relx=0.0, rely=0.0, anchor="nw", x=10, y=10)
+
+        # Versus Mode button (top-left, below Game Mode)
+        self.versus_button = tk.Button(
+            self.master,
+            text=f"{VERSUS_PLAYERS} Players",
+            command=self.toggle_versus_mode,
+            font=("Arial", 13, "bold")
+        )
+        if self.versus:
+            self.versus_button.place(relx=0.0, rely=0.0, anchor="nw", x=10, y=50)
+
+        # New: Scoreboard button (top center)
+        self.scoreboard_button = tk.Button(
+            self.master,
+            text="Scoreboard",
+            command=self.show_persistent_scoreboard,
+            font=("Arial", 13),
+            fg="black",
+            bg="yellow"
+        )
+        self.scoreboard_button.place(relx=0.5, rely=0.0, anchor="n", y=10)
+
+        # Scoreboard and Warning labels (hidden by default)
+        self.score_label = tk.Label(self.master, text="", font=("Arial", 24, "bold"), bg=GREEN, fg="white")
+        self.warning_label = None
+        self.play_again_button = None
+
+        # Start polling inputs and animation updates
+        self.poll_inputs()
+        self.update_animation()
+        
+    # ------------------- Modes -------------------
+    @property
+    def game_mode(self):
+        return self.mode.label == "game"  # Playing or showing the result
+
+    @property
+    def teasing_mode(self):
+        return self.mode.name == "teasing"
+
+    @property
+    def versus_mode(self):
+        return self.mode.name == "versus"
+
+    def set_mode(self, name):
+        """ Switch to mode `name`; switching to the current mode restarts it (Play Again). """
+        previous, mode = self.mode, self.modes[name]
+        if mode.label != previous.label:
+            self.events.log("mode", {"mode": mode.label})
+        previous.exit(mode)
+        self.mode = mode
+        self.governor.protect_input = mode.protect_input
+        if (mode.poll_ms is None) != (previous.poll_ms is None):
+            self.governor.pause()  # Switches between poll and animation ticks (see governor.py)
+        if hasattr(self.gpio, "set_group_active"):  # Sample the sensors only while they are read
+            self.gpio.set_group_active(self.sensor_group, "sensors" in mode.inputs)
+        mode.enter(previous)
+        self.schedule_poll()
+
+    def toggle_teasing_mode(self):
+        if self.mode.name in ("single", "teasing"):  # Do nothing if a game mode is active
+            self.set_mode("single" if self.teasing_mode else "teasing")
+
+    def toggle_game_mode(self):
+        if not self.versus_mode:
+            self.set_mode("single" if self.game_mode else "game")
+
+    def toggle_versus_mode(self):
+        if self.versus and not self.game_mode:
+            self.set_mode("single" if self.versus_mode else "versus")
+
+    def clear_overlays(self):
+        """ Remove the scoreboard, warning and Play Again button if shown. """
+        if self.scoreboard_frame:
+            self.scoreboard_frame.destroy()
+            self.scoreboard_frame = None
+        self.score_label.place_forget()
+        if self.warning_label:
+            self.warning_label.destroy()
+            self.warning_label = None
+        if self.play_again_button:
+            self.play_again_button.destroy()
+            self.play_again_button = None
+    
+    def reset_game(self):
+        self.events.log("play_again")
+        self.set_mode("game")  # Clears the result and starts over after the round delay
+    
+    # ------------------- Game Engine Events -------------------
+    def on_game_event(self, event, data):
+        """ Render the engine's state changes. """
+        self.events.log(event, data)
+        if event == "round_started":
+            self.metrics.rounds += 1
+            self.start_new_round(data["cat"])
+        elif event == "hit":
+            self.metrics.hits += 1
+            self.metrics.reaction_s.observe(data["elapsed"])
+            self.handle_cat_hit(data["cat"], data["round"], data["elapsed"])
+        elif event == "wrong_hit":
+            self.metrics.wrong_hits += 1
+            self.handle_wrong_hit(data["cat"])
+            self.set_mode("game_over")
+        elif event == "finished":
+            self.metrics.games += 1
+            self.show_scoreboard()
+            self.set_mode("game_over")
+        elif event in ("waiting", "stopped"):
+            self.cats.stop_all()
+
+    def start_new_round(self, cat_index):
+        self.cats.spin_only(cat_index)  # also resets that cat's frame
+    
+    def handle_cat_hit(self, cat_index, round_number, elapsed):
+        """ Called when the correct cat is hit; the engine waits 669ms before the next round. """
+        self.cats.stop(cat_index)
+        self.analytics.record_round(self.sensor_pins[cat_index], round_number, elapsed)
+    
+    def handle_wrong_hit(self, wrong_cat_index):
+        """ Called when a wrong cat is hit. Show warning, play warning sound, and show Play Again button. """
+        self.cats.stop_all()
+        self.analytics.record_wrong_hit()
+        self.save_history(completed=False)
+        if self.sound_playing:
+            self.music_channel.stop()
+            self.sound_playing = False
+            self.metrics.audio_stops += 1
+            self.events.log("audio", {"state": "stop"})
+        self.music_channel.play_once(self.warning_sound)
+        self.events.log("audio", {"state": "warning"})
+        self.warning_label = tk.Label(
+            self.master, 
+            text="Wrong Cat Hit! Game Over!", 
+            font=("Arial", 35, "bold"),
+            fg="red",
+            bg="black"
+        )
+        self.warning_label.place(relx=0.5, rely=0.5, anchor="center")
+        self.play_again_button = tk.Button(
+            self.master,
+            text="Play Again",
+            command=self.reset_game,
+            font=("Arial", 16, "bold"),
+            fg="white",
+            bg="blue"
+        )
+        self.play_again_button.place(relx=0.5, rely=0.8, anchor="center")
+    
+    def show_scoreboard(self):
+        self.cats.hide()
+        total_time = self.engine.total_time
+        self.scores.append(total_time)
+        self.analytics.record_game(total_time)
+        self.save_history(completed=True)
+        self.export_stats()
+        # NEW: Create a scoreboard frame for a styled, multi-line scoreboard.
+        self.scoreboard_frame = tk.Frame(self.master, bg=GREEN)
+        self.scoreboard_frame.place(relx=0.5, rely=0.5, anchor="center")
+        title_label = tk.Label(self.scoreboard_frame, text="The Cats Are Tired Now.", font=("Arial", 30, "bold"), fg="black", bg=GREEN)
+        title_label.pack(pady=(0,10))
+        for i, t in enumerate(self.engine.round_times):
+            round_label = tk.Label(self.scoreboard_frame, text=f"Round {i+1}: {t:.2f} sec", font=("Arial", 21), fg="black", bg=GREEN)
+            round_label.pack()
+        total_label = tk.Label(self.scoreboard_frame, text=f"Total: {total_time:.2f} sec", font=("Arial", 28, "bold"), fg="Blue", bg=GREEN)
+        total_label.pack(pady=(10,0))
+        self.play_again_button = tk.Button(
+            self.master,
+            text="Play Again",
+            command=self.reset_game,
+            font=("Arial", 16, "bold"),
+            fg="white",
+            bg="blue"
+        )
+        self.play_again_button.place(relx=0.5, rely=0.9, anchor="center")
+    
+    # ------------------- Versus Mode -------------------
+    def show_player_labels(self):
+        """ One status line per player under their share of the cats. """
+        self.hide_player_labels()
+        for player, (first, count) in enumerate(self.versus.ranges):
+            lbl = tk.Label(self.master, text=f"Player {player + 1}", font=("Arial", 18, "bold"),
+                           fg="black", bg=GREEN)
+            relx = (self.cats.relx[first] + self.cats.relx[first + count - 1]) / 2
+            lbl.place(relx=relx, rely=0.97, anchor="s")
+            self.player_labels.append(lbl)
+
+    def hide_player_labels(self):
+        for lbl in self.player_labels:
+            lbl.destroy()
+        self.player_labels = []
+
+    def on_versus_event(self, player, event, data):
+        """ Render one player's engine events; the other players are unaffected. """
+        if event == "all_done":
+            self.events.log("versus_done", {"winner": data["results"]["winner"], "tied": data["results"]["tied"]})
+            self.show_versus_results(data["results"])
+            return
+        self.events.log(event, dict(data, player=player))
+        group_mask = self.versus.masks[player]
+        label = self.player_labels[player] if player < len(self.player_labels) else None
+        if event == "round_started":
+            self.metrics.rounds += 1
+            self.cats.spin(data["cat"], group_mask)
+            if label:
+                label.config(text=f"Player {player + 1}: round {data['round']}")
+        elif event == "hit":
+            self.metrics.hits += 1
+            self.metrics.reaction_s.observe(data["elapsed"])
+            self.cats.stop(data["cat"])
+            self.analytics.record_round(self.sensor_pins[data["cat"]], data["round"], data["elapsed"])
+        elif event == "wrong_hit":
+            self.metrics.wrong_hits += 1
+            self.cats.stop_group(group_mask)
+            self.analytics.record_wrong_hit()
+            self.music_channel.play_once(self.warning_sound)
+            self.events.log("audio", {"state": "warning"})
+            if label:
+                label.config(text=f"Player {player + 1}: wrong cat!", fg="red")
+        elif event == "finished":
+            self.metrics.games += 1
+            if label:
+                label.config(text=f"Player {player + 1}: {data['total']:.2f} sec", fg="blue")
+        elif event in ("waiting", "stopped"):
+            self.cats.stop_group(group_mask)
+            if label:
+                label.config(text=f"Player {player + 1}", fg="black")
+
+    def show_versus_results(self, results):
+        self.cats.hide()
+        self.hide_player_labels()
+        self.scoreboard_frame = tk.Frame(self.master, bg=GREEN)
+        self.scoreboard_frame.place(relx=0.5, rely=0.5, anchor="center")
+        winner = results["winner"]
+        if winner is not None:
+            title = f"Player {winner + 1} Wins!"
+        elif results["tied"]:
+            title = " and ".join(f"Player {p + 1}" for p in results["tied"]) + " Tie!"
+        else:
+            title = "Nobody Wins. The Cats Win."
+        title_label = tk.Label(self.scoreboard_frame, text=title, font=("Arial", 30, "bold"), fg="black", bg=GREEN)
+        title_label.pack(pady=(0,10))
+        for r in results["players"]:
+            if r["completed"]:
+                text = f"Player {r['player'] + 1}: {r['total']:.2f} sec"
+            else:
+                text = f"Player {r['player'] + 1}: wrong cat in round {r['hits'] + 1}"
+            tk.Label(self.scoreboard_frame, text=text, font=("Arial", 21), fg="black", bg=GREEN).pack()
+        self.play_again_button = tk.Button(
+            self.master,
+            text="Play Again",
+            command=self.reset_versus,
+            font=("Arial", 16, "bold"),
+            fg="white",
+            bg="blue"
+        )
+        self.play_again_button.place(relx=0.5, rely=0.9, anchor="center")
+
+    def reset_versus(self):
+        self.events.log("play_again")
+        self.clear_overlays()
+        self.cats.place()
+        self.show_player_labels()
+        self.versus.start()
+
+    # ------------------- Persistent Scoreboard -------------------
+    def show_persistent_scoreboard(self):
+        scoreboard_win = tk.Toplevel(self.master)
+        scoreboard_win.title("Scoreboard")
+        scoreboard_win.geometry("400x520")
+        if not self.scores:
+            scores_text = "No scores yet.\nPlay with the cats first."
+        else:
+            scores_text = "\n".join([f"Game {i+1}: {score:.2f} sec" for i, score in enumerate(self.scores)])
+        label = tk.Label(scoreboard_win, text=scores_text, font=("Arial", 16, "bold"), fg="black")
+        label.pack(expand=True, fill="both")
+        stats_label = tk.Label(scoreboard_win, text=self.analytics.summary_text(), font=("Arial", 11), fg="black")
+        stats_label.pack(fill="x")
+        close_btn = tk.Button(scoreboard_win, text="Close", command=scoreboard_win.destroy,
+                              font=("Arial", 14, "bold"), fg="white", bg="blue")
+        close_btn.pack(pady=22)
+    
+    def export_stats(self):
+        """ Write the running statistics summary next to the game (JSON and CSV). """
+        if self.io is None:
+            write_stats(self.analytics)
+        else:
+            self.io(write_stats, copy.deepcopy(self.analytics))  # Play goes on while it is written
+
+    def save_history(self, completed):
+        """ Append this game's rounds to the history file used by analyze.py. """
+        pins = [self.sensor_pins[i] for i in self.engine.round_cats]
+        args = (time.time(), pins, list(self.engine.round_times), completed)
+        if self.io is None:
+            write_history(*args)
+        else:
+            self.io(write_history, *args)
+
+    # ------------------- Polling & Animation -------------------
+    def poll_inputs(self):
+        self._poll_handle = None
+        if self.watchdog is not None:
+            self.watchdog.beat()
+        metrics = self.metrics
+        metrics.poll_ticks += 1
+        lateness = self.governor.poll_tick()
+        if lateness is not None:
+            metrics.tick_lateness_ms.observe(lateness)
+            if lateness > LATE_MS:
+                self.events.log("late_tick", {"lateness_ms": round(lateness, 1)})
+        self.mode.poll()
+        self.schedule_poll()
+
+    def schedule_poll(self):
+        """ Keep one input tick pending while the mode polls, none while it does not. """
+        poll_ms = self.mode.poll_ms
+        if poll_ms is None:
+            if self._poll_handle is not None:
+                self.clock.cancel(self._poll_handle)
+                self._poll_handle = None
+        elif self._poll_handle is None:
+            self._poll_handle = self.clock.after(poll_ms, self.poll_inputs)
+        self.expect_beats()
+
+    def expect_beats(self):
+        """ Tell the watchdog how far apart this screen's beats are in the current mode. """
+        if self.watchdog is not None:
+            interval = self.governor.animation_ms
+            if self.mode.poll_ms is not None:
+                interval = min(interval, self.mode.poll_ms)
+            self.watchdog.expect(self, interval)
+
+    def read_button(self):
+        """ One button read; True while it is held. """
+        self.metrics.gpio_reads += 1
+        return self.gpio.read(self.button_pin) == 0
+
+    def read_sensors(self):
+        """ One group read; changes are logged so a session can be replayed (see replay.py). """
+        self.metrics.gpio_reads += 1
+        mask = self.gpio.read_group(self.sensor_group)
+        if mask != self.last_sensors:
+            self.last_sensors = mask
+            self.events.log("sensors", {"mask": mask})
+        return mask
+
+    def update_music(self, playing):
+        """ Loop the music while `playing`, stop it otherwise. """
+        if playing and not self.sound_playing:
+            self.sound_playing = True
+            self.metrics.audio_starts += 1
+            self.music_channel.play_loop(self.sound)
+            self.events.log("audio", {"state": "start"})
+        elif not playing and self.sound_playing:
+            self.sound_playing = False
+            self.metrics.audio_stops += 1
+            self.music_channel.stop()
+            self.events.log("audio", {"state": "stop"})
+
+    def update_animation(self):
+        if self.watchdog is not None:
+            self.watchdog.beat()
+        self.metrics.animation_ticks += 1
+        if self.mode.poll_ms is None:  # No input tick to measure (see governor.py)
+            self.governor.idle_tick()
+            self.expect_beats()
+        self.draw_frame()
+        self._animation_handle = self.clock.after(self.governor.animation_ms, self.update_animation)
+
+    def draw_frame(self):
+        self.mode.draw()
+
+    def stop_ticks(self):
+        """ Cancel the pending ticks and game timers, so none of them fires once the window is gone. """
+        for handle in (self._poll_handle, self._animation_handle):
+            if handle is not None:
+                self.clock.cancel(handle)
+        self._poll_handle = self._animation_handle = None
+        self.engine.stop()
+        if self.versus:
+            self.versus.stop()
+
+    def cleanup(self):
+        self.stop_ticks()
+        self.music_channel.stop()
+        if self.owns_gpio:
+            self.gpio.close()
+        if self.owns_assets:
+            self.assets.close()
+
+def load_stats():
+    """ The statistics of earlier sessions, so stats.json keeps covering all of them. """
+    return ReactionAnalytics.load_json(STATS_JSON_PATH)
+
+def write_stats(analytics):
+    try:
+        analytics.export_json(STATS_JSON_PATH)
+        analytics.export_csv(STATS_CSV_PATH)
+    except OSError:
+        pass  # Never let a full SD card stop the game.
+
+def write_history(ended_at, pins, round_times, completed):
+    try:
+        # Read the next id at write time so screens sharing the file never collide.
+        history.append_game(HISTORY_PATH, history.next_game_id(HISTORY_PATH), ended_at,
+                            pins, round_times, completed)
+    except OSError:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SPINS")
+    parser.add_argument("--shared-assets", action="store_true",
+                        help="share decoded assets with other SPINS processes (see sharedassets.py)")
+    parser.add_argument("--geometry", default="1280x720",
+                        help='window size as WxH[+X+Y], or "auto" to fill the screen')
+    parser.add_argument("--frames", choices=FRAME_STORAGE_MODES, default=FRAME_STORAGE,
+                        help="keep every GIF frame as a PhotoImage, or packed and expanded on demand")
+    parser.add_argument("--memory-report", action="store_true", help="print the memory used per asset at startup")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on localhost:PORT/metrics")
+    parser.add_argument("--sample-hz", type=int, default=0,
+                        help="sample the sensors this often and reject flicker (see sampler.py), e.g. 2000")
+    parser.add_argument("--no-flicker-filter", action="store_true",
+                        help="with --sample-hz, only count missed sensor pulses")
+    parser.add_argument("--input-process", action="store_true",
+                        help="sample the GPIO pins in a separate process (see inputproc.py)")
+    parser.add_argument("--input-cpu", type=int, help="with --input-process, pin it to this CPU core")
+    parser.add_argument("--stall-ms", type=int, default=STALL_MARGIN_MS,
+                        help="log mainloop stalls longer than the poll interval plus this many ms")
+    parser.add_argument("--audio", choices=("pygame", "null"), default="pygame",
+                        help='"null" runs without a sound device (see audio.py)')
+    parser.add_argument("--runtime", choices=("tk", "asyncio"), default="tk",
+                        help="Tk mainloop, or Tk pumped from an asyncio loop (see aioruntime.py)")
+    args = parser.parse_args(argv)
+    if args.input_process and args.sample_hz:
+        parser.error("--input-process and --sample-hz are alternatives")
+    root = tk.Tk()
+    runtime = None
+    if args.runtime == "asyncio":
+        from aioruntime import AsyncioRuntime
+        runtime = AsyncioRuntime(root)
+    assets = default_assets(shared=args.shared_assets, frames=args.frames, audio=make_audio(args.audio))
+    events = EventLog(EVENT_LOG_PATH)
+    install_dump_signal(events)
+    watchdog = Watchdog(events, interval_ms=POLL_MS, margin_ms=args.stall_ms)
+    gpio = None
+    if args.input_process:
+        gpio = ProcessGpio(cpu=args.input_cpu)
+    elif args.sample_hz:
+        gpio = SampledGpio(LgpioBackend(), args.sample_hz, filter=not args.no_flicker_filter)
+    app = AnimatedGifApp(root, assets=assets, geometry=args.geometry, events=events, watchdog=watchdog,
+                         gpio=gpio, clock=runtime.clock if runtime else None,
+                         io=runtime.io if runtime else None)
+    if args.memory_report:
+        print(format_memory_report(assets.memory_report()))
+    server = None
+    if args.metrics_port is not None:
+        exporter = MetricsExporter()
+        exporter.add(app.metrics, screen="0")
+        exporter.watchdog = watchdog
+        if runtime:
+            runtime.serve_metrics(exporter, args.metrics_port)
+        else:
+            server = MetricsServer(exporter, args.metrics_port)
+    def on_closing():
+        if server:
+            server.close()
+        watchdog.close()
+        app.cleanup()
+        if gpio:
+            gpio.close()
+        assets.close()
+        events.close()
+        root.destroy()
+        if runtime:
+            runtime.stop()
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+    if runtime:
+        runtime.run()
+    else:
+        root.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+"""
+Runtime counters and a local Prometheus endpoint.
+
+    python3 main.py --metrics-port 9464
+    curl -s localhost:9464/metrics
+
+Counters are plain ints and histogram buckets a list of ints, bumped only
+from the Tk thread; the HTTP server thread just reads them when scraped
+(one writer, so no locks are needed under the GIL). Rates such as fps and
+GPIO reads per second are worked out at scrape time from the change
+since the previous scrape.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = "127.0.0.1"
+LATENESS_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+REACTION_BUCKETS_S = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Counter attribute of AppMetrics -> (exported name, help)
+COUNTERS = {
+    "poll_ticks": ("spins_poll_ticks_total", "Input poll ticks."),
+    "animation_ticks": ("spins_animation_ticks_total", "Animation ticks."),
+    "gpio_reads": ("spins_gpio_reads_total", "GPIO reads (one per pin group)."),
+    "glitches_rejected": ("spins_glitches_rejected_total", "Sensor glitches rejected before reaching the game."),
+    "games": ("spins_games_total", "Games played to the end (Game and Versus Mode players)."),
+    "rounds": ("spins_rounds_total", "Rounds started."),
+    "hits": ("spins_hits_total", "Correct cats hit."),
+    "wrong_hits": ("spins_wrong_hits_total", "Wrong cats hit."),
+    "audio_starts": ("spins_audio_starts_total", "Music starts."),
+    "audio_stops": ("spins_audio_stops_total", "Music stops."),
+}
+
+
+class Histogram:
+    """ Fixed buckets; observe() is one bisect and two additions. """
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot: above every bound
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class AppMetrics:
+    """ Counters of one screen. The app bumps the attributes directly. """
+
+    def __init__(self, governor=None):
+        for attr in COUNTERS:
+            setattr(self, attr, 0)
+        self.tick_lateness_ms = Histogram(LATENESS_BUCKETS_MS)
+        self.reaction_s = Histogram(REACTION_BUCKETS_S)
+        self.governor = governor
+        self.inputs = None  # Sampled sensor group with per-pin edge counters (see sampler.py)
+
+
+def rss_bytes():
+    """ Resident set size of this process (Linux), or None. """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _escape(value):
+    """ A label value with backslash, double quote and newline escaped, as the text format requires. """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    items = dict(labels, **extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(out, name, labels, hist):
+    counts = list(hist.counts)
+    cumulative = 0
+    for bound, count in zip(hist.bounds + ("+Inf",), counts):
+        cumulative += count
+        out.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+    out.append(f"{name}_sum{_labels(labels)} {_number(hist.sum)}")
+    out.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+
+class MetricsExporter:
+    """ Renders every registered screen in the Prometheus text format. """
+
+    def __init__(self):
+        self.sources = []     # (labels, AppMetrics)
+        self._previous = {}   # id(metrics) -> (time, poll ticks, animation ticks, gpio reads)
+        self._lock = threading.Lock()  # Scrapes may overlap; the Tk thread never takes it
+        self.watchdog = None  # Process-wide stall counters, see watchdog.py
+
+    def add(self, metrics, **labels):
+        self.sources.append((labels, metrics))
+
+    def remove(self, metrics):
+        self.sources = [(labels, m) for labels, m in self.sources if m is not metrics]
+
+    def render(self):
+        with self._lock:
+            return self._render(time.monotonic())
+
+    def _render(self, now):
+        out = []
+
+        def family(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        sources = list(self.sources)
+        for attr, (name, help_text) in COUNTERS.items():
+            family(name, "counter", help_text)
+            for labels, m in sources:
+                out.append(f"{name}{_labels(labels)} {getattr(m, attr)}")
+
+        for name, attr, help_text in (
+            ("spins_tick_lateness_ms", "tick_lateness_ms", "How late input poll ticks fire."),
+            ("spins_reaction_seconds", "reaction_s", "Reaction time of correct hits."),
+        ):
+            family(name, "histogram", help_text)
+            for labels, m in sources:
+                _histogram(out, name, labels, getattr(m, attr))
+
+        rates = []
+        for labels, m in sources:
+            current = (now, m.poll_ticks, m.animation_ticks, m.gpio_reads)
+            previous = self._previous.get(id(m))
+            self._previous[id(m)] = current
+            if previous is None or current[0] <= previous[0]:
+                continue
+            dt = current[0] - previous[0]
+            rates.append((labels, (current[2] - previous[2]) / dt, (current[3] - previous[3]) / dt))
+        family("spins_fps", "gauge", "Animation frames per second since the previous scrape.")
+        for labels, fps, _ in rates:
+            out.append(f"spins_fps{_labels(labels)} {fps:.3f}")
+        family("spins_gpio_reads_per_second", "gauge", "GPIO reads per second since the previous scrape.")
+        for labels, _, reads in rates:
+            out.append(f"spins_gpio_reads_per_second{_labels(labels)} {reads:.3f}")
+
+        sampled = [(labels, m.inputs) for labels, m in sources if m.inputs is not None]
+        if sampled:
+            family("spins_input_edges_total", "counter", "Sensor activations seen by the sampling thread.")
+            for labels, g in sampled:
+                for pin, edges in zip(g.pins, list(g.edges)):
+                    out.append(f"spins_input_edges_total{_labels(labels, pin=pin)} {edges}")
+            family("spins_input_edges_missed_total", "counter",
+                   "Sensor activations that started and ended between two input polls.")
+            for labels, g in sampled:
+                for pin, missed in g.missed().items():
+                    out.append(f"spins_input_edges_missed_total{_labels(labels, pin=pin)} {missed}")
+            timed = [(labels, g.latency_s) for labels, g in sampled if getattr(g, "latency_s", None) is not None]
+            if timed:  # Input process only (see inputproc.py)
+                family("spins_input_latency_seconds", "histogram", "Time from an input sample to the read that used it.")
+                for labels, hist in timed:
+                    _histogram(out, "spins_input_latency_seconds", labels, hist)
+
+        governed = [(labels, m.governor.metrics()) for labels, m in sources if m.governor is not None]
+        for key, kind, help_text in (
+            ("animation_interval_ms", "gauge", "Animation interval chosen by the frame governor."),
+            ("steps_down", "counter", "Frame governor steps to a slower animation."),
+            ("steps_up", "counter", "Frame governor steps back to a faster animation."),
+            ("late_ticks", "counter", "Input poll ticks more than 15ms late."),
+            ("tick_lateness_p90_ms", "gauge", "p90 poll tick lateness of the governor's last window."),
+            ("temperature_c", "gauge", "SoC temperature."),
+        ):
+            name = f"spins_governor_{key}" + ("_total" if kind == "counter" else "")
+            family(name, kind, help_text)
+            for labels, values in governed:
+                if values[key] is not None:
+                    out.append(f"{name}{_labels(labels)} {_number(values[key])}")
+
+        watchdog = self.watchdog
+        if watchdog is not None:
+            family("spins_stalls_total", "counter", "Mainloop stalls caught by the watchdog.")
+            out.append(f"spins_stalls_total {watchdog.stalls}")
+            family("spins_hangs_total", "counter", "Stalls that lasted longer than the watchdog's hang limit.")
+            out.append(f"spins_hangs_total {watchdog.hangs}")
+            family("spins_stall_seconds", "histogram", "Duration of mainloop stalls.")
+            _histogram(out, "spins_stall_seconds", {}, watchdog.stall_s)
+
+        rss = rss_bytes()
+        if rss is not None:
+            family("spins_resident_memory_bytes", "gauge", "Resident set size of the SPINS process.")
+            out.append(f"spins_resident_memory_bytes {rss}")
+        return "\n".join(out) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    exporter = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.exporter.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+class MetricsServer:
+    """ Serves an exporter on http://host:port/metrics from a daemon thread. """
+
+    def __init__(self, exporter, port, host=METRICS_HOST):
+        handler = type("Handler", (_Handler,), {"exporter": exporter})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="spins-metrics", daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
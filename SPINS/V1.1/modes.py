@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""
+Screen modes as explicit states.
+
+A screen is in exactly one mode. The mode owns what an input tick reads and
+does, how a frame is drawn and how often inputs are polled:
+
+    mode       on screen                          inputs    polled
+    single     the big cat spins while the        button    every poll_ms
+               button is held
+    teasing    every sensor spins its own cat     sensors   every poll_ms
+    game       one player hits the spinning cat   sensors   every poll_ms
+    game_over  scoreboard or wrong-cat screen     -         never
+    versus     players race on their cats         sensors   every poll_ms
+
+poll_inputs() and draw_frame() hand each tick straight to the current mode.
+AnimatedGifApp.set_mode() calls exit() on the old mode and enter() on the new
+one, then starts or stops the poll tick. It also tells a sampling backend
+(see sampler.py) whether the sensors are wanted, so game_over and single
+stop sampling them. To the outside (the "mode" event, app.game_mode, the
+Stop Playing button) game and game_over are one "game" label; switching
+between them keeps the game screen up.
+"""
+
+
+class Mode:
+    """ Base mode: reads nothing, draws the cat bank. """
+    name = None
+    label = None            # Mode as logged and toggled; game_over shows as "game"
+    inputs = ()             # What poll() reads: "button" and/or "sensors"
+    protect_input = False   # The frame governor sheds animation earlier (see governor.py)
+
+    def __init__(self, app, poll_ms):
+        self.app = app
+        self.poll_ms = poll_ms  # Input tick interval; None stops the tick while the mode is active
+
+    def enter(self, previous):
+        pass
+
+    def exit(self, following):
+        pass
+
+    def poll(self):
+        pass
+
+    def draw(self):
+        # Only spinning cats and cats that just stopped are redrawn.
+        self.app.cats.render(self.app.gif_frames, self.app.still_image)
+
+
+class SingleMode(Mode):
+    """ One big cat that spins (with music) while the button is held. """
+    name = label = "single"
+    inputs = ("button",)
+
+    def __init__(self, app, poll_ms):
+        super().__init__(app, poll_ms)
+        self.pressed = False
+        self.frame = 0
+        self.shown = False      # The label shows a GIF frame
+
+    def enter(self, previous):
+        self.app.image_label.place(relx=0.5, rely=0.5, anchor="center")
+
+    def poll(self):
+        app = self.app
+        pressed = app.read_button()
+        if pressed != self.pressed:
+            self.pressed = pressed
+            app.events.log("button", {"pressed": pressed})
+        app.update_music(pressed)
+
+    def draw(self):
+        app = self.app
+        if self.pressed:
+            self.frame = (self.frame + 1) % app.total_frames
+            app.image_label.config(image=app.gif_frames[self.frame])
+            self.shown = True
+        elif self.shown:
+            app.image_label.config(image=app.still_image)
+            self.shown = False
+
+
+class TeasingMode(Mode):
+    """ Every sensor spins its own cat while it is hit. """
+    name = label = "teasing"
+    inputs = ("sensors",)
+
+    def enter(self, previous):
+        app = self.app
+        app.tease_button.config(text="Back")
+        app.image_label.place_forget()
+        app.cats.place()
+
+    def exit(self, following):
+        self.app.tease_button.config(text="Teasing Mode")
+        self.app.cats.hide()
+
+    def poll(self):
+        app = self.app
+        app.cats.spinning = app.read_sensors()
+        app.update_music(app.cats.spinning != 0)
+
+
+class GameMode(Mode):
+    """ A running game; the engine only takes input while a round can be hit. """
+    name = label = "game"
+    inputs = ("sensors",)
+    protect_input = True
+
+    def enter(self, previous):
+        app = self.app
+        app.clear_overlays()
+        app.cats.place()
+        if previous.label != "game":
+            app.game_button.config(text="Stop Playing")
+            app.image_label.place_forget()
+            app.tease_button.config(state="disabled")
+            app.versus_button.config(state="disabled")
+        app.engine.start()  # Round delay (1800ms) before the first round
+
+    def exit(self, following):
+        if following.label != "game":
+            _close_game_screen(self.app)
+
+    def poll(self):
+        app = self.app
+        if app.engine.accepting_input:  # Not during the start delay
+            app.engine.process_inputs(app.read_sensors())
+            app.update_music(app.cats.spinning != 0)
+
+
+class GameOverMode(Mode):
+    """ The scoreboard or wrong-cat screen of a finished game, until Play Again or Stop Playing. """
+    name = "game_over"
+    label = "game"
+
+    def exit(self, following):
+        if following.label != "game":
+            _close_game_screen(self.app)
+
+
+class VersusMode(Mode):
+    """ Each player plays their own game on their share of the cats, from one sampling pass. """
+    name = label = "versus"
+    inputs = ("sensors",)
+    protect_input = True
+
+    def enter(self, previous):
+        app = self.app
+        app.versus_button.config(text="Stop Playing")
+        app.image_label.place_forget()
+        app.clear_overlays()
+        app.cats.place()
+        app.show_player_labels()
+        app.versus.start()
+        app.tease_button.config(state="disabled")
+        app.game_button.config(state="disabled")
+
+    def exit(self, following):
+        app = self.app
+        app.versus.stop()
+        app.clear_overlays()
+        app.hide_player_labels()
+        app.versus_button.config(text=f"{len(app.versus.engines)} Players")
+        app.cats.hide()
+        app.tease_button.config(state="normal")
+        app.game_button.config(state="normal")
+
+    def poll(self):
+        app = self.app
+        if app.versus.accepting_input:
+            app.versus.process_inputs(app.read_sensors())
+        app.update_music(app.cats.spinning != 0)
+
+
+def _close_game_screen(app):
+    app.engine.stop()
+    app.clear_overlays()
+    app.game_button.config(text="Play With Cats")
+    app.cats.hide()
+    app.tease_button.config(state="normal")
+    app.versus_button.config(state="normal")
+
+
+MODES = (SingleMode, TeasingMode, GameMode, GameOverMode, VersusMode)
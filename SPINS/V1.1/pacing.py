@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+"""
+Fixed-rate sampling loops, shared by the sampling thread (sampler.py) and
+the input process (inputproc.py). Standard library only, so the input
+process stays small.
+"""
+
+import time
+
+
+class Pacer:
+    """ Keeps a loop at one iteration per period without bursting after a stall. """
+
+    def __init__(self, period, max_behind):
+        self.period = period
+        self.max_behind = max_behind * period  # Lateness (in periods) after which the schedule restarts
+        self.due = time.perf_counter()
+
+    def wait(self):
+        """ Sleep until the next iteration is due; True if the loop had fallen max_behind periods behind. """
+        self.due += self.period
+        delay = self.due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -self.max_behind:
+            self.due = time.perf_counter()  # Resume at the rate instead of bursting to catch up
+            return True
+        return False
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""
+Replay recorded sessions through the real SPINS screen.
+
+    python3 replay.py events.jsonl                  # real time
+    python3 replay.py events.jsonl --speed 10
+    python3 replay.py events.jsonl.1 events.jsonl --speed max --screen 1
+
+The event log (see eventlog.py) records every sensor and button change,
+mode change and Play Again, plus the target cat of every round. They are
+fed back into an AnimatedGifApp on a virtual clock with simulated GPIO, and
+the engine draws the recorded targets instead of random ones, so the games
+play out as they did (reaction times can differ by up to half a poll
+interval, as the replay's polls are not in step with the recorded ones).
+
+The virtual clock runs `speed` times faster than the wall clock; "max"
+runs it as fast as the code allows. Either way the screen is drawn once per
+display frame and the animation frames in between are skipped. History and
+statistics go to a temporary directory, and audio is muted unless
+SDL_AUDIODRIVER is set.
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from clock import VirtualClock
+from gpio import SimulatedGpio
+
+FRAME_MS = 40          # Display frame interval while replaying
+MAX_SPEED_BUDGET_S = 0.03  # "max": virtual time simulated per display frame is bounded by this much CPU
+MAX_SPEED_CHUNK_S = 1.0
+REPLAYED = ("sensors", "button", "mode", "play_again")
+INPUT_LEAD_S = 0.025   # Inputs are logged by the poll that saw them; they changed up to a poll interval before
+
+
+def load_events(paths, screen=None):
+    """ Events of all files (e.g. a rotated log and the current one) in time order. """
+    events = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a power cut
+                if screen is None or str(event.get("screen")) == screen:
+                    events.append(event)
+    events.sort(key=lambda e: e["t"])
+    return events
+
+
+class ScriptedRng:
+    """ Stands in for an engine's random.Random: hands out the recorded target cats. """
+
+    def __init__(self, cats):
+        self.cats = collections.deque(cats)
+        self.fallback = random.Random(0)
+
+    def randrange(self, n):
+        while self.cats:
+            cat = self.cats.popleft()
+            if 0 <= cat < n:
+                return cat
+        return self.fallback.randrange(n)
+
+
+def set_mode(app, mode):
+    """ Switch to a logged mode; a game that is over already counts as "game". """
+    if app.mode.label != mode:
+        app.set_mode(mode)
+
+
+class Replay:
+    """ Schedules recorded inputs and UI actions on the app's virtual clock. """
+
+    def __init__(self, app, clock, gpio, events):
+        self.app = app
+        self.clock = clock
+        self.gpio = gpio
+        self.recorded = collections.Counter(e["event"] for e in events)
+        self.end = events[-1]["t"] if events else clock.now()
+        self._script_targets(events)
+        for event in events:
+            if event["event"] in REPLAYED:
+                due = event["t"] - (INPUT_LEAD_S if event["event"] in ("sensors", "button") else 0.0)
+                clock.after(max(0.0, due - clock.now()) * 1000.0, self.apply, event)
+
+    def _script_targets(self, events):
+        game, players = [], collections.defaultdict(list)
+        for e in events:
+            if e["event"] == "round_started":
+                if "player" in e:
+                    players[e["player"]].append(e["cat"])
+                else:
+                    game.append(e["cat"])
+        self.app.engine.rng = ScriptedRng(game)
+        if self.app.versus:
+            for player, engine in enumerate(self.app.versus.engines):
+                first = self.app.versus.ranges[player][0]
+                engine.rng = ScriptedRng(cat - first for cat in players[player])
+
+    def apply(self, event):
+        kind = event["event"]
+        app = self.app
+        if kind == "sensors":
+            for bit, pin in enumerate(app.sensor_pins):
+                self.gpio.set(pin, 0 if event["mask"] >> bit & 1 else 1)
+        elif kind == "button":
+            self.gpio.set(app.button_pin, 0 if event["pressed"] else 1)
+        elif kind == "mode":
+            set_mode(app, event["mode"])
+        elif kind == "play_again":
+            if app.game_mode:
+                app.reset_game()
+            elif app.versus_mode:
+                app.reset_versus()
+
+    def advance(self, target, draw=True):
+        """ Run the clock to `target` drawing nothing, then draw the current state once. """
+        app = self.app
+        app.draw_frame = _skip_frame  # Instance attribute shadows the method while catching up
+        try:
+            self.clock.run_until(min(target, self.end))
+        finally:
+            del app.draw_frame
+        if draw:
+            app.draw_frame()
+
+    @property
+    def done(self):
+        return self.clock.now() >= self.end
+
+    def summary(self):
+        replayed = collections.Counter(e["event"] for e in self.app.events.recent(float("inf")))
+        kinds = ("round_started", "hit", "wrong_hit", "finished")
+        return "\n".join(f"{kind:14} recorded {self.recorded[kind]:6}  replayed {replayed[kind]:6}"
+                         for kind in kinds)
+
+
+def _skip_frame():
+    pass
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded SPINS sessions.")
+    parser.add_argument("logs", nargs="+", help="event log files (events.jsonl, rotated ones first)")
+    parser.add_argument("--speed", default="1", help='playback speed factor, or "max"')
+    parser.add_argument("--screen", help="replay only this kiosk screen")
+    parser.add_argument("--geometry", default="1280x720")
+    args = parser.parse_args(argv)
+    speed = None if args.speed == "max" else float(args.speed)
+
+    events = load_events(args.logs, args.screen)
+    if not events:
+        print("no events to replay", file=sys.stderr)
+        return 1
+
+    import tkinter as tk
+    import main
+    from eventlog import EventLog
+    workdir = tempfile.mkdtemp(prefix="spins-replay-")
+    main.HISTORY_PATH = os.path.join(workdir, "history.bin")
+    main.STATS_JSON_PATH = os.path.join(workdir, "stats.json")
+    main.STATS_CSV_PATH = os.path.join(workdir, "stats.csv")
+
+    root = tk.Tk()
+    clock = VirtualClock(start=events[0]["t"])
+    gpio = SimulatedGpio()
+    log = EventLog(clock=clock, capacity=max(1024, 4 * len(events)))
+    app = main.AnimatedGifApp(root, clock=clock, gpio=gpio, geometry=args.geometry, events=log)
+    replay = Replay(app, clock, gpio, events)
+    title = root.title()
+    started = time.perf_counter()
+    start_virtual = clock.now()
+
+    def frame():
+        if speed is None:
+            deadline = time.perf_counter() + MAX_SPEED_BUDGET_S
+            while time.perf_counter() < deadline and not replay.done:
+                replay.advance(clock.now() + MAX_SPEED_CHUNK_S, draw=False)
+            app.draw_frame()
+        else:
+            replay.advance(start_virtual + (time.perf_counter() - started) * speed)
+        root.title(f"{title} - replay {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(clock.now()))}")
+        if replay.done:
+            elapsed = time.perf_counter() - started
+            print(f"replayed {replay.end - start_virtual:.0f}s of play in {elapsed:.1f}s "
+                  f"({(replay.end - start_virtual) / max(elapsed, 1e-9):.0f}x)")
+            print(replay.summary())
+            app.cleanup()
+            root.destroy()
+            return
+        root.after(FRAME_MS, frame)
+
+    root.protocol("WM_DELETE_WINDOW", lambda: (app.cleanup(), root.destroy()))
+    root.after(FRAME_MS, frame)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+"""
+High-rate sensor sampling with flicker rejection.
+
+One read every 50ms cannot tell a laser on a sensor from the 100 Hz flicker
+of mains lighting or the PWM of stage lights: all of them read "lit" some
+of the time. SampledGpio wraps a GPIO backend and samples every sensor
+group at RATE_HZ from a background thread into a ring. read_group() then
+looks at the last WINDOW_MS of each sensor, all sensors at once in NumPy
+(plain Python when NumPy is missing):
+
+    duty cycle  fraction of samples that read lit
+    toggles     level changes in the window (flicker toggles every half period)
+
+A sensor counts as hit only while it is lit for ON_DUTY of the window with
+at most MAX_TOGGLES changes, i.e. a steady beam; anything toggling faster is
+flicker or a glitch and is rejected (and counted). This delays a real hit
+by at most ON_DUTY * WINDOW_MS (18ms). The button is read directly.
+
+The sampling thread also counts every sensor activation it sees, and
+read_group() counts the activations the poll path gets to see. A pulse
+that starts and ends between two polls (a laser swept across a sensor)
+shows up in the first count only, so `edges - polled` per pin is input
+lost at the current poll rate (and, with filtering on, pulses too short
+for the filter). Activations while a sensor is classified as flickering
+are not counted. With filtering off, read_group() returns the latest raw
+sample, so the counts show what plain polling loses.
+
+set_group_active(group, False) stops sampling a group the screen's mode
+does not read (see modes.py); after it is made active again, read_group()
+reads 0 until a full window of fresh samples is in.
+
+    python3 main.py --sample-hz 2000
+    python3 main.py --sample-hz 2000 --no-flicker-filter    # count only
+"""
+
+import threading
+from array import array
+
+from catstate import iter_bits
+from pacing import Pacer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RATE_HZ = 2000        # Samples per second per sensor group
+WINDOW_MS = 20        # Two periods of 100 Hz flicker
+ON_DUTY = 0.9         # Lit fraction of the window that counts as a steady beam
+MAX_TOGGLES = 1       # More level changes than this in one window is flicker
+RING_S = 0.5          # Samples kept per group
+
+
+class _Group:
+    __slots__ = ("pins", "width", "ring", "count", "flicker", "rejected", "metrics",
+                 "edges", "polled", "last_read", "active", "since")
+
+    def __init__(self, pins, size):
+        self.pins = list(pins)
+        self.width = len(self.pins)
+        self.ring = np.zeros(size, np.uint32) if np is not None else array("I", bytes(4 * size))
+        self.count = 0        # Samples written; only the sampling thread changes it
+        self.flicker = 0      # Bits classified as flicker at the last read
+        self.rejected = 0     # Sensors that started flickering, over all reads
+        self.metrics = None   # AppMetrics whose glitches_rejected this group feeds
+        self.edges = [0] * self.width   # Activations per pin seen by the sampling thread (its counters)...
+        self.polled = [0] * self.width  # ...and seen by read_group() (the Tk thread's)
+        self.last_read = 0
+        self.active = True    # Sampled by the thread; set by the Tk thread
+        self.since = 0        # count when it was last made active; older samples are stale
+
+    def missed(self):
+        """ Per pin: activations the poll path never saw. """
+        return {pin: max(0, e - p) for pin, e, p in zip(self.pins, self.edges, self.polled)}
+
+
+class SampledGpio:
+    """ A GPIO backend whose sensor groups are sampled at rate_hz and filtered on read. """
+
+    def __init__(self, gpio, rate_hz=RATE_HZ, window_ms=WINDOW_MS, filter=True):
+        self.gpio = gpio
+        self.filter = filter
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.window = max(2, round(rate_hz * window_ms / 1000.0))
+        self.size = max(self.window * 2, int(rate_hz * RING_S))
+        self.groups = {}
+        self._sampled = ()    # (handle, group) pairs; rebound, never mutated, so the thread needs no lock
+        self.late = 0         # Times the sampling thread fell a whole window behind
+        if np is not None:
+            self._offsets = np.arange(self.window)
+        self._closing = threading.Event()
+        self._thread = None
+
+    # --- Backend interface ---
+    def claim_inputs(self, pins):
+        self.gpio.claim_inputs(pins)
+
+    def read(self, pin):
+        return self.gpio.read(pin)
+
+    def claim_group(self, pins):
+        handle = self.gpio.claim_group(pins)
+        group = _Group(pins, self.size)
+        self.groups[handle] = group
+        self._sampled = self._sampled + ((handle, group),)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spins-sampler", daemon=True)
+            self._thread.start()
+        return handle
+
+    def attach_metrics(self, group, metrics):
+        """ Feed metrics.glitches_rejected and export the group's edge counters. """
+        g = self.groups[group]
+        g.metrics = metrics
+        metrics.inputs = g
+
+    def set_group_active(self, group, active):
+        """ Sample the group or not; the sampling thread skips inactive groups. """
+        g = self.groups[group]
+        if active and not g.active:
+            g.since = g.count
+        g.active = active
+
+    def read_group(self, group):
+        """ Sensors with a steady beam over the last window, as a bitmask. """
+        g = self.groups[group]
+        n = g.count
+        if n - g.since < self.window:
+            return 0
+        if not self.filter:
+            on = int(g.ring[(n - 1) % self.size])
+        else:
+            if np is not None:
+                on, flicker = self._classify_numpy(g, n)
+            else:
+                on, flicker = self._classify_python(g, n)
+            started = flicker & ~g.flicker
+            g.flicker = flicker
+            if started:
+                rejected = bin(started).count("1")
+                g.rejected += rejected
+                if g.metrics is not None:
+                    g.metrics.glitches_rejected += rejected
+        rising = on & ~g.last_read
+        g.last_read = on
+        while rising:
+            bit = rising.bit_length() - 1
+            g.polled[bit] += 1
+            rising &= ~(1 << bit)
+        return on
+
+    def close(self):
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.gpio.close()
+
+    # --- Classification ---
+    def _classify_numpy(self, g, n):
+        samples = g.ring[(n - self.window + self._offsets) % self.size]
+        shifts = np.arange(g.width, dtype=np.uint32)
+        bits = (samples[None, :] >> shifts[:, None]) & 1          # One row per sensor
+        duty = bits.mean(axis=1)
+        toggles = np.count_nonzero(np.diff(bits, axis=1), axis=1)
+        weights = 1 << np.arange(g.width)
+        on = int(np.dot((duty >= ON_DUTY) & (toggles <= MAX_TOGGLES), weights))
+        flicker = int(np.dot(toggles > MAX_TOGGLES, weights))
+        return on, flicker
+
+    def _classify_python(self, g, n):
+        samples = [g.ring[i % self.size] for i in range(n - self.window, n)]
+        on = flicker = 0
+        for bit in range(g.width):
+            levels = [(s >> bit) & 1 for s in samples]
+            toggles = sum(a != b for a, b in zip(levels, levels[1:]))
+            if toggles > MAX_TOGGLES:
+                flicker |= 1 << bit
+            elif sum(levels) >= ON_DUTY * self.window:
+                on |= 1 << bit
+        return on, flicker
+
+    # --- Sampling thread ---
+    def _run(self):
+        read_group = self.gpio.read_group
+        size = self.size
+        previous = {}
+        pacer = Pacer(self.period, self.window)
+        while not self._closing.is_set():
+            for handle, g in self._sampled:
+                if not g.active:
+                    continue
+                mask = read_group(handle)
+                g.ring[g.count % size] = mask
+                g.count += 1
+                rising = mask & ~previous.get(handle, 0) & ~g.flicker
+                previous[handle] = mask
+                for bit in iter_bits(rising):
+                    g.edges[bit] += 1
+            if pacer.wait():
+                self.late += 1
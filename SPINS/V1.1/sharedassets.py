@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Decoded assets shared between SPINS processes through POSIX shared memory.
+
+The first process decodes the assets into an asset pack (assetpack.py) and
+publishes it under a name derived from the source files; later processes
+attach to the same pages instead of decoding again. The segment outlives
+the processes (it sits in /dev/shm until reboot) so restarts attach too.
+A segment name is <config>-<version>: the config part covers the source
+paths and settings (background, mixer format), the version part the file
+contents and the pack format. Publishing a new version removes the older
+versions of the same config only; processes running another config keep
+theirs. A segment whose publisher died before sealing it is replaced after
+ATTACH_TIMEOUT, and if shared memory cannot hold the pack the process
+decodes for itself.
+
+Tk and SDL still copy what they are given into their own PhotoImage and
+Mix_Chunk memory, so per-process cost is one copy of the frames instead of
+the GIF/MP3 decode plus that copy.
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from assetpack import PACK_VERSION, AssetPack, is_sealed, seal
+
+SHM_PREFIX = "spins-assets-"
+ATTACH_TIMEOUT = 30.0  # Seconds to wait for another process to finish publishing
+
+
+def source_key(paths, *extra):
+    """
+    "<config>-<version>": config changes with the source paths and extra
+    settings, version with the file contents and the pack format.
+    """
+    config = hashlib.sha1(repr(extra).encode())
+    version = hashlib.sha1(str(PACK_VERSION).encode())
+    for path in paths:
+        st = os.stat(path)
+        config.update(os.path.abspath(path).encode())
+        version.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    return f"{config.hexdigest()[:12]}-{version.hexdigest()[:12]}"
+
+
+def _untrack(shm):
+    # Python's resource tracker would unlink the segment when this process
+    # exits, pulling it from under the other screens.
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def _map(shm):
+    """
+    Our own mapping of the segment. SharedMemory.close() (also run from
+    __del__) refuses while views into it exist, and frame views live as long
+    as the app.
+    """
+    mapping = mmap.mmap(shm._fd, shm.size)
+    shm.close()
+    return mapping
+
+
+def _attach(name, deadline):
+    """ Attach and wait until the pack is sealed; FileNotFoundError if nobody published it. """
+    while True:
+        # SharedMemory() leaks its fd when the segment is not sized yet, so look first.
+        if os.stat(f"/dev/shm/{name}").st_size:
+            shm = shared_memory.SharedMemory(name=name)
+            _untrack(shm)
+            if is_sealed(shm.buf):
+                return _map(shm)
+            shm.close()
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"shared assets {name} were never completed")
+        time.sleep(0.05)
+
+
+def _remove_stale(keep):
+    """ Unlink the other versions of keep's config; other configs may be in use. """
+    config = keep.rsplit("-", 1)[0]
+    for path in glob.glob(f"/dev/shm/{config}-*"):
+        name = os.path.basename(path)
+        if name != keep:
+            try:
+                os.unlink(path)  # Processes that still map it keep their pages
+            except OSError:
+                pass
+
+
+def _publish(name, pack):
+    """ Copy a built pack into a new segment; None if another process created it first. """
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(pack))
+    except FileExistsError:
+        return None
+    try:
+        # Reserve the pages up front: a full /dev/shm is an OSError here
+        # instead of SIGBUS halfway through the copy.
+        os.posix_fallocate(shm._fd, 0, len(pack))
+    except OSError:
+        shm.close()
+        shm.unlink()
+        raise
+    _untrack(shm)
+    shm.buf[:len(pack)] = pack
+    seal(shm.buf)
+    _remove_stale(name)
+    return _map(shm)
+
+
+def shared_pack(key, build):
+    """
+    Attach to the pack published under key, or build() one and publish it.
+    Returns (mapping, AssetPack); keep the mmap referenced while the pack is in use.
+    Falls back to a private copy when the pack cannot be shared.
+    """
+    name = SHM_PREFIX + key
+    pack = None
+    for attempt in range(2):
+        deadline = time.monotonic() + ATTACH_TIMEOUT
+        try:
+            mapping = _attach(name, deadline)
+        except FileNotFoundError:
+            pack = pack or build()
+            try:
+                mapping = _publish(name, pack)
+            except OSError as e:
+                print(f"cannot share decoded assets ({e}); using a private copy", file=sys.stderr)
+                break
+            if mapping is None:  # Another process published first
+                try:
+                    mapping = _attach(name, deadline)
+                except (FileNotFoundError, TimeoutError):
+                    continue
+            return mapping, AssetPack(mapping)
+        except TimeoutError:
+            # The publisher died before sealing; its segment would block every start until reboot.
+            print(f"shared assets {name} were never completed; publishing them again", file=sys.stderr)
+            try:
+                os.unlink(f"/dev/shm/{name}")  # May still be empty, which SharedMemory cannot open
+            except OSError:
+                pass
+        else:
+            return mapping, AssetPack(mapping)
+    pack = pack or build()
+    seal(pack)
+    return pack, AssetPack(pack)
+
+
+def remove(key):
+    """ Drop a published pack; processes already attached are unaffected. """
+    try:
+        shm = shared_memory.SharedMemory(name=SHM_PREFIX + key)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
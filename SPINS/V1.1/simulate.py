@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""
+Monte-Carlo simulation of Game Mode on the headless engine, no display needed.
+
+    python3 simulate.py --games 1000000 --rounds 5 7 10 --next-delay 500 669 900
+
+Every combination of rounds / start delay / next-round delay is simulated
+with the same player model, split across a process pool.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from clock import VirtualClock
+from engine import GameEngine, ROUNDS_PER_GAME, START_DELAY_MS, NEXT_ROUND_DELAY_MS
+
+POLL_MS = 50  # The app samples sensors every 50ms
+
+
+class SimulatedPlayer:
+    """
+    Aims at each new target after a log-normal reaction time; with probability
+    wrong_rate the laser lands on another cat instead. Hits are seen on the
+    next poll tick like on the real kiosk.
+    """
+
+    def __init__(self, engine, rng, median_reaction=0.9, sigma=0.35, wrong_rate=0.03, poll_ms=POLL_MS):
+        self.engine = engine
+        self.rng = rng
+        self.mu = math.log(median_reaction)
+        self.sigma = sigma
+        self.wrong_rate = wrong_rate
+        self.poll_ms = poll_ms
+        engine.subscribe(self.on_event)
+
+    def on_event(self, event, data):
+        if event != "round_started":
+            return
+        cat = data["cat"]
+        n = self.engine.n_cats
+        if n > 1 and self.rng.random() < self.wrong_rate:
+            cat = (cat + self.rng.randrange(1, n)) % n
+        delay_ms = self.rng.lognormvariate(self.mu, self.sigma) * 1000.0
+        delay_ms += self.rng.uniform(0, self.poll_ms)  # wait for the next poll
+        self.engine.clock.after(delay_ms, self.press, cat)
+
+    def press(self, cat):
+        self.engine.process_inputs(1 << cat)
+
+
+def run_batch(job):
+    """ Simulate one chunk of games; returns summable totals (runs in a worker). """
+    games, seed, rounds, start_delay_ms, next_delay_ms, player = job
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    engine = GameEngine(clock, n_cats=3, rounds=rounds, start_delay_ms=start_delay_ms,
+                        next_round_delay_ms=next_delay_ms, rng=rng)
+    SimulatedPlayer(engine, rng, **player)
+    result = {
+        "games": games, "completed": 0, "total": 0.0, "total_sq": 0.0,
+        "duration": 0.0, "rounds_reached": [0] * (rounds + 1),
+    }
+
+    def on_event(event, data):
+        if event == "finished":
+            result["completed"] += 1
+            result["total"] += data["total"]
+            result["total_sq"] += data["total"] * data["total"]
+
+    engine.subscribe(on_event)
+    for _ in range(games):
+        started = clock.now()
+        engine.start()
+        clock.run_until_idle()
+        result["duration"] += clock.now() - started
+        result["rounds_reached"][engine.hits_count] += 1
+    return result
+
+
+def merge(results):
+    merged = None
+    for r in results:
+        if merged is None:
+            merged = dict(r, rounds_reached=list(r["rounds_reached"]))
+            continue
+        for key in ("games", "completed", "total", "total_sq", "duration"):
+            merged[key] += r[key]
+        merged["rounds_reached"] = [a + b for a, b in zip(merged["rounds_reached"], r["rounds_reached"])]
+    return merged
+
+
+def summarise(config, r):
+    done = r["completed"]
+    mean_total = r["total"] / done if done else None
+    stdev_total = math.sqrt(max(r["total_sq"] / done - mean_total ** 2, 0.0)) if done else None
+    return dict(config, **{
+        "games": r["games"],
+        "completion_rate": done / r["games"],
+        "mean_total": mean_total,
+        "stdev_total": stdev_total,
+        "mean_game_seconds": r["duration"] / r["games"],
+        "games_per_hour": 3600.0 * r["games"] / r["duration"] if r["duration"] else None,
+        "rounds_reached": r["rounds_reached"],
+    })
+
+
+def simulate(games, configs, player, workers, seed=0):
+    chunks = max(1, workers * 4)
+    jobs, owners = [], []
+    for c, config in enumerate(configs):
+        for k in range(chunks):
+            n = games // chunks + (1 if k < games % chunks else 0)
+            if n:
+                jobs.append((n, hash((seed, c, k)), config["rounds"],
+                             config["start_delay_ms"], config["next_delay_ms"], player))
+                owners.append(c)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_batch, jobs, chunksize=1))
+    else:
+        results = [run_batch(job) for job in jobs]
+    return [
+        summarise(config, merge(r for r, owner in zip(results, owners) if owner == c))
+        for c, config in enumerate(configs)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte-Carlo simulation of SPINS Game Mode.")
+    parser.add_argument("--games", type=int, default=100000, help="games per configuration")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[ROUNDS_PER_GAME])
+    parser.add_argument("--start-delay", type=int, nargs="+", default=[START_DELAY_MS], help="ms")
+    parser.add_argument("--next-delay", type=int, nargs="+", default=[NEXT_ROUND_DELAY_MS], help="ms")
+    parser.add_argument("--median-reaction", type=float, default=0.9, help="player median reaction (s)")
+    parser.add_argument("--sigma", type=float, default=0.35, help="log-normal spread of reaction times")
+    parser.add_argument("--wrong-rate", type=float, default=0.03, help="chance of hitting a wrong cat per round")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    configs = [
+        {"rounds": r, "start_delay_ms": s, "next_delay_ms": d}
+        for r, s, d in itertools.product(args.rounds, args.start_delay, args.next_delay)
+    ]
+    player = {"median_reaction": args.median_reaction, "sigma": args.sigma, "wrong_rate": args.wrong_rate}
+    t0 = time.perf_counter()
+    summaries = simulate(args.games, configs, player, args.workers, args.seed)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{'rounds':>6} {'start':>6} {'next':>5} {'complete':>9} {'mean total':>11} {'game sec':>9} {'games/h':>8}")
+    for s in summaries:
+        mean_total = f"{s['mean_total']:.2f}s" if s["mean_total"] is not None else "-"
+        print(f"{s['rounds']:6d} {s['start_delay_ms']:6d} {s['next_delay_ms']:5d} "
+              f"{s['completion_rate']:9.1%} {mean_total:>11} {s['mean_game_seconds']:9.2f} "
+              f"{s['games_per_hour']:8.0f}")
+    total_games = args.games * len(configs)
+    print(f"\n{total_games} games simulated in {elapsed:.2f}s ({total_games / elapsed:.0f} games/s, {args.workers} workers)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"player": player, "results": summaries}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
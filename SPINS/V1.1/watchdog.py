@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Mainloop stall watchdog.
+
+poll_inputs and update_animation beat the watchdog on every tick. Each app
+tells it how often its beats come (the poll interval, or the animation
+interval while its mode does not poll); the shortest one counts, as any
+beat shows the mainloop is running. A thread checks the beat a few times per
+poll interval; when it is more than the margin overdue, a Tk callback (or Tk itself) is blocking the mainloop and
+input is not being sampled. The watchdog then grabs the main thread's
+Python stack, and once the beats resume logs a "stall" event with its
+duration and that stack. A mainloop that stays stuck for HANG_S is logged
+as a "hang" straight away, so a frozen kiosk still leaves a trace.
+"""
+
+import sys
+import threading
+import time
+import traceback
+
+from metrics import Histogram
+
+STALL_MARGIN_MS = 200     # Beats this much later than expected count as a stall
+CHECK_MS = 25             # How often the watchdog thread looks at the beat
+HANG_S = 5.0              # Log a still-running stall after this long
+STACK_DEPTH = 12          # Innermost frames kept per captured stack
+STALL_BUCKETS_S = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+def main_thread_stack(depth=STACK_DEPTH):
+    """ The main thread's current stack as "file:line function" strings, innermost last. """
+    frame = sys._current_frames().get(threading.main_thread().ident)
+    if frame is None:
+        return []
+    return [f"{fs.filename}:{fs.lineno} {fs.name}" for fs in traceback.extract_stack(frame)[-depth:]]
+
+
+class Watchdog:
+    """ Watches the Tk thread's heartbeat from a daemon thread. """
+
+    def __init__(self, events, interval_ms=50, margin_ms=STALL_MARGIN_MS, check_ms=CHECK_MS):
+        self.events = events
+        self.interval_ms = interval_ms    # Until an app calls expect()
+        self.margin_ms = margin_ms
+        self.deadline_s = (interval_ms + margin_ms) / 1000.0
+        self._intervals = {}      # Beat source -> its beat interval (ms), Tk thread only
+        self.check_s = check_ms / 1000.0
+        self.last_beat = None     # time.monotonic() of the latest beat; None until the first one
+        self.stalls = 0
+        self.hangs = 0
+        self.stall_s = Histogram(STALL_BUCKETS_S)
+        self.longest_s = 0.0
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spins-watchdog", daemon=True)
+        self._thread.start()
+
+    def beat(self):
+        """ Tk thread: one attribute store per tick. """
+        self.last_beat = time.monotonic()
+
+    def expect(self, source, interval_ms):
+        """ Tk thread: source beats every interval_ms from now on. """
+        if self._intervals.get(source) != interval_ms:
+            self._intervals[source] = interval_ms
+            self.deadline_s = (min(self._intervals.values()) + self.margin_ms) / 1000.0
+
+    def _run(self):
+        stalled_since = None      # Last beat before the current stall
+        stack = None
+        hung = False
+        while not self._closing.wait(self.check_s):
+            beat = self.last_beat
+            if beat is None:
+                continue
+            now = time.monotonic()
+            if stalled_since is None:
+                if now - beat > self.deadline_s:
+                    stalled_since = beat
+                    stack = main_thread_stack()
+                    hung = False
+            elif beat != stalled_since:
+                self._record(beat - stalled_since, stack)
+                stalled_since = None
+            elif not hung and now - stalled_since > HANG_S:
+                hung = True
+                self.hangs += 1
+                self.events.log_threadsafe("hang", {"stalled_ms": round((now - stalled_since) * 1000),
+                                                    "stack": main_thread_stack()})
+
+    def _record(self, duration, stack):
+        self.stalls += 1
+        self.stall_s.observe(duration)
+        self.longest_s = max(self.longest_s, duration)
+        self.events.log_threadsafe("stall", {"duration_ms": round(duration * 1000), "stack": stack})
+
+    def close(self):
+        self._closing.set()
+        self._thread.join()